@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from extensions import db
+from models import UserResponses
+from questions import OTHERS, QUESTIONS, QUESTION_FIELDS
+
+
+LOAD_CHUNK_SIZE = 10000
+
+
+def load_responses(fields=QUESTION_FIELDS, criteria=(), chunk_size=LOAD_CHUNK_SIZE):
+    """Read user_responses columns into a DataFrame of categoricals without building ORM objects.
+
+    Rows stream from a Core select `chunk_size` at a time; each chunk is factorized per column and
+    only its int32 codes are kept, so memory peaks at one chunk of tuples plus the codes instead of
+    the whole table as model instances, dicts and object columns. `criteria` filter the select.
+    """
+    columns = [getattr(UserResponses, field) for field in fields]
+    categories = [{} for _ in fields]   # answer -> code, per column
+    codes = [[] for _ in fields]        # int32 code arrays, one per chunk
+    result = db.session.connection().execute(  # Core execution: plain Row tuples, no ORM loading layer
+        db.select(*columns).where(*criteria).order_by(UserResponses.id).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        for index, values in enumerate(zip(*partition)):
+            chunk_codes, uniques = pd.factorize(np.array(values, dtype=object))
+            lookup = np.array([categories[index].setdefault(answer, len(categories[index])) for answer in uniques]
+                              + [-1], dtype=np.int32)
+            codes[index].append(lookup[chunk_codes])  # missing answers (-1) pick the trailing -1
+    return pd.DataFrame({
+        field: pd.Categorical.from_codes(np.concatenate(codes[index]) if codes[index] else np.empty(0, np.int32),
+                                         categories=list(categories[index]))
+        for index, field in enumerate(fields)
+    })
+
+
+def count_options(column, spec):
+    """Return (total responses, option counts sorted like value_counts) for one question column.
+
+    The column is factorized first so parsing and lowercasing run once per distinct answer rather
+    than once per row; the per-answer weights come from a single bincount. Categorical columns
+    (as returned by load_responses) reuse their codes.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        codes, uniques = pd.factorize(column)
+    weights = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    total = int(weights.sum())
+
+    options = pd.Series(uniques, dtype=object).map(spec.options).explode().dropna()
+    weights = weights[options.index.to_numpy()]
+
+    counts = (pd.Series(weights, index=pd.Index(options.to_numpy(), name='response'), name='count', dtype="int64")
+              .groupby(level=0, sort=False).sum()
+              .sort_values(ascending=False, kind='stable'))
+    return total, counts
+
+
+def aggregate_responses(df, specs=QUESTIONS):
+    """Count every question of a user_responses DataFrame: {field: (total, counts)}."""
+    return {spec.field: count_options(df[spec.field], spec) for spec in specs}
+
+
+def build_figure(spec, total, counts):
+    """Draw one question's chart from its option counts (a Series or an {option: count} dict)."""
+    counts = pd.Series(counts, dtype="int64").sort_values(ascending=False, kind='stable')
+    frame = counts.rename_axis('response').rename('count').reset_index()
+
+    if spec.percent_labels:
+        frame['percentage'] = (frame['count'] / frame['count'].sum() * 100).round(1)
+        frame['label'] = frame['count'].astype(str) + ' (' + frame['percentage'].astype(str) + '%)'
+    if spec.hide_others:
+        frame = frame[frame['response'] != OTHERS].reset_index(drop=True)
+    text = 'label' if spec.percent_labels else None
+
+    if spec.chart == "pie":
+        fig = px.pie(frame, values='count', names='response')
+    elif spec.chart == "hbar":
+        fig = px.bar(frame, x='count', y='response', orientation='h', text=text)
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+    else:
+        fig = px.bar(frame, x='response', y='count', text=text)
+
+    if spec.chart != "pie":
+        fig.update_traces(textposition='outside')
+        fig.update_layout(showlegend=False)
+    if spec.axis_titles:
+        fig.update_layout(xaxis_title=spec.axis_titles[0], yaxis_title=spec.axis_titles[1])
+    if spec.size:
+        fig.update_layout(width=spec.size[0], height=spec.size[1])
+    fig.update_layout(title={'text': f"{spec.title}<br><sup>{total} responses</sup>"})
+    return fig
@@ -0,0 +1,68 @@
+from sqlalchemy import exists, func, literal, union_all
+from extensions import db
+from models import ResponseAnswer, UserResponses
+from questions import OTHERS, QUESTIONS, QUESTION_FIELDS
+
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def answer_rows(response_id, record):
+    """response_answers rows for one stored response ({field: stored answer})."""
+    rows = []
+    for spec in QUESTIONS:
+        answer = record.get(spec.field)
+        if answer is None:
+            continue
+        selected, other_text = spec.parse(answer)
+        for option in selected:
+            rows.append({
+                "response_id": response_id,
+                "question": spec.field,
+                "option": option.lower() if spec.lowercase else option,
+                "other_text": other_text if option == OTHERS else None,
+            })
+    return rows
+
+
+def store_answers(response_ids, records):
+    rows = [row for response_id, record in zip(response_ids, records) for row in answer_rows(response_id, record)]
+    if rows:  # a Core insert is one executemany; the ORM bulk path splits it wherever other_text turns None
+        db.session.execute(ResponseAnswer.__table__.insert(), rows)
+
+
+def option_counts_query():
+    """(question, option, count) for every option and "Others" text, counted inside the database."""
+    items = union_all(
+        db.select(ResponseAnswer.question, ResponseAnswer.option.label('option')),
+        db.select(ResponseAnswer.question, ResponseAnswer.other_text.label('option'))
+        .where(ResponseAnswer.other_text.is_not(None)),
+    ).subquery()
+    return (db.select(items.c.question, items.c.option, func.count().label('count'))
+            .group_by(items.c.question, items.c.option))
+
+
+def response_totals_query(total_label):
+    """(question, total_label, answered responses) per question, from one aggregate over user_responses."""
+    counts = db.select(*[func.count(getattr(UserResponses, field)).label(field) for field in QUESTION_FIELDS]).subquery()
+    return union_all(*[db.select(literal(field).label('question'), literal(total_label).label('option'),
+                                 counts.c[field].label('count'))
+                       for field in QUESTION_FIELDS])
+
+
+def backfill_answers():
+    """Write response_answers for responses stored before the table existed; resumable, returns rows read."""
+    columns = [UserResponses.id, *[getattr(UserResponses, field) for field in QUESTION_FIELDS]]
+    missing = ~exists().where(ResponseAnswer.response_id == UserResponses.id)
+    last_id, done = 0, 0
+    while True:
+        batch = db.session.execute(
+            db.select(*columns).where(UserResponses.id > last_id, missing)
+            .order_by(UserResponses.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            return done
+        store_answers([row.id for row in batch], [row._mapping for row in batch])
+        db.session.commit()
+        last_id = batch[-1].id
+        done += len(batch)
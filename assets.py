@@ -0,0 +1,172 @@
+from flask import current_app, request, send_file, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+
+
+ASSET_BUILD_DIR = "build"  # under the static folder, written by `flask build-assets`
+ASSET_MANIFEST = "manifest.json"
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".json", ".txt", ".html"}
+COMPRESS_MIMETYPES = {"text/html", "text/plain", "text/csv", "application/json"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preference order, best first
+SOURCE_MAP_URL = re.compile(rb"(sourceMappingURL=)([^\s*]+)")
+
+
+def fingerprinted_name(name, content):
+    """CSS/styles.css -> CSS/styles.<sha256[:12]>.css"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)  # mkstemp's 0600 would hide the file from a separate static file server
+    os.replace(tmp, path)
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:  # optional: without it only .gz variants are built
+        return None
+    return brotli
+
+
+def build_assets(static_folder, extra=None):
+    """Fingerprint and precompress everything under `static_folder` into its build/ directory.
+
+    `extra` maps more logical names to files outside it (e.g. the plotly bundle). Source maps are
+    hashed first so the files that reference them point at the fingerprinted map. Returns the
+    manifest, logical name -> fingerprinted name, which is also written as build/manifest.json.
+    """
+    build_dir = os.path.join(static_folder, ASSET_BUILD_DIR)
+    sources = dict(extra or {})
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and ASSET_BUILD_DIR in dirs:
+            dirs.remove(ASSET_BUILD_DIR)
+        for filename in files:
+            path = os.path.join(root, filename)
+            sources[os.path.relpath(path, static_folder).replace(os.sep, "/")] = path
+
+    brotli = _brotli()
+    manifest, written = {}, {ASSET_MANIFEST}
+    for name in sorted(sources, key=lambda name: (not name.endswith(".map"), name)):
+        with open(sources[name], "rb") as f:
+            content = f.read()
+        ext = os.path.splitext(name)[1]
+        if ext in (".css", ".js"):
+            directory = os.path.dirname(name)
+
+            def rewrite(match):
+                target = manifest.get(f"{directory}/{match[2].decode()}".lstrip("/"))
+                return match[1] + os.path.basename(target).encode() if target else match[0]
+            content = SOURCE_MAP_URL.sub(rewrite, content)
+
+        built = manifest[name] = fingerprinted_name(name, content)
+        path = os.path.join(build_dir, built)
+        written.add(built)
+        if not os.path.exists(path):  # same name, same content
+            _write(path, content)
+        if ext not in COMPRESSIBLE:
+            continue
+        variants = {".gz": lambda: gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = lambda: brotli.compress(content, quality=11)
+        for suffix, compress in variants.items():
+            written.add(built + suffix)
+            if not os.path.exists(path + suffix):
+                _write(path + suffix, compress())
+
+    for root, _, files in os.walk(build_dir):  # drop what earlier builds left behind
+        for filename in files:
+            path = os.path.join(root, filename)
+            if os.path.relpath(path, build_dir).replace(os.sep, "/") not in written:
+                os.remove(path)
+    _write(os.path.join(build_dir, ASSET_MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def load_manifest(static_folder):
+    """The manifest of the last build, or {} when `flask build-assets` hasn't been run."""
+    try:
+        with open(os.path.join(static_folder, ASSET_BUILD_DIR, ASSET_MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def built_asset_url(filename, **values):
+    """URL of the fingerprinted build of a static file, or None if it isn't in the manifest."""
+    built = current_app.extensions.get('assets', {}).get(filename)
+    return url_for('asset', filename=built, **values) if built else None
+
+
+def asset_url_for(endpoint, **values):
+    """url_for() that sends static files to their fingerprinted, precompressed build when there is one."""
+    if endpoint == 'static' and 'filename' in values:
+        url = built_asset_url(**values)
+        if url:
+            return url
+    return url_for(endpoint, **values)
+
+
+def asset_view(filename):
+    """Serve a built asset, precompressed as br or gzip when the client takes it, cached for a year."""
+    if filename not in current_app.extensions['asset_files']:
+        raise NotFound()
+    path = safe_join(current_app.static_folder, ASSET_BUILD_DIR, filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.exists(path + suffix):
+            path, encoding = path + suffix, candidate
+            break
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def compress_response(response):
+    """gzip HTML/JSON/text bodies on the fly; files and streamed exports are left alone."""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES or response.status_code in (204, 304)
+            or response.status_code < 200):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.set_data(gzip.compress(data, current_app.config['COMPRESS_LEVEL'], mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:  # the bytes differ from the identity encoding's
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_assets(app):
+    """Serve the last `flask build-assets` output under /assets/ and compress dynamic responses."""
+    manifest = load_manifest(app.static_folder)
+    app.extensions['assets'] = manifest
+    app.extensions['asset_files'] = frozenset(manifest.values())
+    app.extensions['asset_build'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+    app.jinja_env.globals['asset_url_for'] = asset_url_for
+    app.add_url_rule('/assets/<path:filename>', 'asset', asset_view)
+    if app.config['COMPRESS_RESPONSES']:
+        app.after_request(compress_response)
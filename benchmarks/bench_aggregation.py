@@ -0,0 +1,51 @@
+"""Compare the per-question aggregation engine with the original admin_dashboard loops.
+
+    python -m benchmarks.bench_aggregation [--rows 10000 100000 1000000]
+"""
+import argparse
+from collections import Counter
+import pandas as pd
+from analytics import aggregate_responses
+from benchmarks.common import best_of
+from benchmarks.synthetic import synthetic_responses
+from questions import QUESTIONS
+
+
+def legacy_aggregate(df):
+    """The counting done by the original eleven QUESTION N ANALYSIS blocks (which split "Others" text on ', ')."""
+    results = {}
+    for spec in QUESTIONS:
+        if spec.field in ("question1", "question3"):
+            results[spec.field] = df[spec.field].value_counts()
+            continue
+        items = []
+        for response in df[spec.field]:
+            items.extend(response.split(', '))
+        items_df = pd.DataFrame(items, columns=['response'])
+        if spec.lowercase:
+            items_df['response'] = items_df['response'].str.lower()
+        results[spec.field] = items_df['response'].value_counts()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'engine (s)':>12} {'speedup':>8}")
+    for rows in args.rows:
+        df = synthetic_responses(rows)
+        engine = aggregate_responses(df)
+        for spec in QUESTIONS:  # the engine must agree with a plain per-row count before timing it
+            expected = Counter(option for answer in df[spec.field] for option in spec.options(answer))
+            assert engine[spec.field][1].to_dict() == expected, spec.field
+
+        _, legacy_time = best_of(args.repeat, legacy_aggregate, df)
+        _, engine_time = best_of(args.repeat, aggregate_responses, df)
+        print(f"{rows:>10} {legacy_time:>12.3f} {engine_time:>12.3f} {legacy_time / engine_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
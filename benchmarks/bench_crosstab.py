@@ -0,0 +1,58 @@
+"""Time crosstab_counts() against the ad-hoc pandas way (explode both questions, pd.crosstab).
+
+    python -m benchmarks.bench_crosstab [--rows 1000 100000 1000000] [--pair question11 question2]
+"""
+import argparse
+from collections import Counter
+import pandas as pd
+from benchmarks.common import best_of
+from benchmarks.synthetic import synthetic_responses
+from crosstab import crosstab_counts
+from questions import QUESTIONS_BY_FIELD
+
+
+def pandas_crosstab(df, rows, columns, filters):
+    segment = df
+    for field, options in filters.items():
+        spec = QUESTIONS_BY_FIELD[field]
+        segment = segment[segment[field].map(lambda answer: bool(set(spec.options(answer)) & set(options)))]
+    pairs = pd.DataFrame({rows: segment[rows].map(QUESTIONS_BY_FIELD[rows].options),
+                          columns: segment[columns].map(QUESTIONS_BY_FIELD[columns].options)})
+    pairs = pairs.explode(rows).explode(columns).reset_index(drop=True)
+    return pd.crosstab(pairs[rows], pairs[columns])
+
+
+def reference(df, rows, columns, filters):
+    counts = Counter()
+    for row_answer, column_answer, *filter_answers in zip(df[rows], df[columns], *[df[f] for f in filters]):
+        if all(set(QUESTIONS_BY_FIELD[f].options(a)) & set(o) for (f, o), a in zip(filters.items(), filter_answers)):
+            for row_option in QUESTIONS_BY_FIELD[rows].options(row_answer):
+                for column_option in QUESTIONS_BY_FIELD[columns].options(column_answer):
+                    counts[row_option, column_option] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--pair", nargs=2, default=["question11", "question2"])
+    args = parser.parse_args()
+    rows, columns = args.pair
+    filters = {"question1": ["1-3 years", "3-5 years"]}
+
+    print(f"{'rows':>10} {'pandas (s)':>11} {'crosstab (s)':>13} {'speedup':>8}")
+    for size in args.rows:
+        df = synthetic_responses(size)
+        frame = df.astype("category")
+        result, engine_time = best_of(1, crosstab_counts, frame, rows, columns, filters)
+        expected, pandas_time = best_of(1, pandas_crosstab, df, rows, columns, filters)
+        table = {(r, c): count for r, line in zip(result["row_labels"], result["counts"])
+                 for c, count in zip(result["column_labels"], line) if count}
+        assert table == {key: count for key, count in expected.stack().items() if count}
+        if size <= 100_000:
+            assert table == reference(df, rows, columns, filters)
+        print(f"{size:>10} {pandas_time:>11.3f} {engine_time:>13.4f} {pandas_time / engine_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
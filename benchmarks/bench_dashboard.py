@@ -0,0 +1,70 @@
+"""Microbenchmark the dashboard figure path per stage: token, load, aggregate, render, at 1k-100k responses.
+
+    python -m benchmarks.bench_dashboard [--rows 1000 10000 100000] [--repeat 3] [--database-url URL] [--json FILE]
+
+Responses are seeded through store_submissions(), so response_tally is kept the way /home keeps it,
+into a throwaway SQLite database unless --database-url is given; each size adds to the previous
+one. The stages are the ones figure_snapshot() runs for every question on a cache miss: "token" is
+change_token(), "load" load_tallies(), "aggregate" tally_counts() and "render" build_figure() with
+to_json(). "cached" serves all eleven figures from a warm in-memory snapshot cache.
+"""
+import argparse
+import json
+import os
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url")
+    parser.add_argument("--json", type=argparse.FileType("w"), help="also write the results as JSON")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'dashboard.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from benchmarks.common import best_of
+    from benchmarks.synthetic import seed_database
+    from cache import LRUCache
+    from extensions import db
+    from questions import QUESTIONS
+    from snapshots import change_token, figure_snapshot, render_figure
+    from tallies import load_tallies, tally_counts
+
+    app = create_app()
+    results = []
+    print(f"{'rows':>10} {'token (ms)':>11} {'load (ms)':>10} {'aggregate (ms)':>15} {'render (ms)':>12} "
+          f"{'cached (ms)':>12}")
+    with app.app_context():
+        db.create_all()
+        render_figure(QUESTIONS[0], 1, {"warm-up": 1})  # plotly's first figure pays its imports
+        stored = 0
+        for rows in sorted(args.rows):
+            seed_database(0 if stored else 100, rows - stored, seed=rows)
+            stored = rows
+
+            token, token_time = best_of(args.repeat, change_token)
+            tallies, load = best_of(args.repeat, lambda: [load_tallies(spec.field) for spec in QUESTIONS])
+            counts, aggregate = best_of(args.repeat, lambda: [tally_counts(question_tallies, spec.field)
+                                                              for spec, question_tallies in zip(QUESTIONS, tallies)])
+            _, render = best_of(args.repeat, lambda: [render_figure(spec, total, options)
+                                                      for spec, (total, options) in zip(QUESTIONS, counts)])
+            cache = LRUCache()
+            for spec in QUESTIONS:
+                figure_snapshot(cache, spec, token)
+            _, cached = best_of(args.repeat, lambda: [figure_snapshot(cache, spec, token) for spec in QUESTIONS])
+
+            results.append({"rows": rows, "token_ms": round(token_time * 1000, 3), "load_ms": round(load * 1000, 3),
+                            "aggregate_ms": round(aggregate * 1000, 3), "render_ms": round(render * 1000, 3),
+                            "cached_ms": round(cached * 1000, 3)})
+            print(f"{rows:>10} {token_time * 1000:>11.2f} {load * 1000:>10.2f} {aggregate * 1000:>15.3f} "
+                  f"{render * 1000:>12.2f} {cached * 1000:>12.3f}")
+    if args.json:
+        json.dump(results, args.json, indent=2)
+
+
+if __name__ == "__main__":
+    main()
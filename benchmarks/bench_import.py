@@ -0,0 +1,78 @@
+"""Bulk import throughput: `flask import-responses` on synthetic JSONL and CSV form exports.
+
+    python -m benchmarks.bench_import [--rows 100000] [--batch-size 2000] [--chunk-size 20000] [--database-url URL]
+
+Rows are the form fields a kiosk would submit (answerN, other_qN) for 100 seeded accounts, with
+one row in a hundred invalid so the reject path is exercised. Each format is imported into the
+same database, through the CLI command, and reports rows read per second.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+
+def write_inputs(directory, rows, accounts, seed=0):
+    from benchmarks.synthetic import synthetic_form
+
+    rng = random.Random(seed)
+    forms = []
+    for number in range(rows):
+        userid, email = rng.choice(accounts)
+        form = {"userid": userid if number % 100 else "UID-UNKNOWN", "useremail": email, **synthetic_form(rng)}
+        forms.append(form)
+    jsonl = os.path.join(directory, "responses.jsonl")
+    with open(jsonl, "w") as f:
+        f.writelines(json.dumps(form) + "\n" for form in forms)
+    columns = sorted({key for form in forms for key in form})
+    path = os.path.join(directory, "responses.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        for form in forms:  # a CSV cell holds a checkbox answer already ', '-joined
+            writer.writerow({key: ", ".join(value) if isinstance(value, list) else value for key, value in form.items()})
+    return {"jsonl": jsonl, "csv": path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(directory, 'import.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from benchmarks.synthetic import seed_database
+    from extensions import db
+    from models import UserDetails
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed_database(100, 0)
+        accounts = db.session.execute(db.select(UserDetails.userid, UserDetails.email)).all()
+    inputs = write_inputs(directory, args.rows, [tuple(account) for account in accounts])
+
+    runner = app.test_cli_runner()
+    print(f"{'format':>6} {'rows':>8} {'seconds':>8} {'rows/s':>8}")
+    for import_format, path in inputs.items():
+        start = time.perf_counter()
+        result = runner.invoke(args=["import-responses", path, "--batch-size", str(args.batch_size),
+                                     "--chunk-size", str(args.chunk_size)])
+        elapsed = time.perf_counter() - start
+        if result.exit_code:
+            raise SystemExit(result.output)
+        print(f"{import_format:>6} {args.rows:>8} {elapsed:>8.2f} {args.rows / elapsed:>8.0f}")
+        print("       " + result.output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
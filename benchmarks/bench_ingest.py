@@ -0,0 +1,96 @@
+"""Compare survey submission throughput: one commit per submission vs the write-behind buffer.
+
+    python -m benchmarks.bench_ingest [--submissions 5000] [--threads 8] [--database-url URL]
+
+Both paths run the same store_submissions() a request would; the synchronous path commits each
+submission on its own like the default /home POST.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def synthetic_record(rng):
+    from benchmarks.synthetic import synthetic_answer
+    from questions import QUESTIONS
+
+    record = {"userid": "UID001", "useremail": "bench@example.com"}
+    record.update({spec.field: synthetic_answer(spec, rng) for spec in QUESTIONS})
+    return record
+
+
+def run_threads(threads, submissions, target):
+    per_thread = submissions // threads
+    workers = [threading.Thread(target=target, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'ingest.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from extensions import db
+    from ingest import SubmissionBuffer, store_submissions
+    from models import UserDetails, UserResponses
+
+    sqlite = args.database_url is None
+    app = create_app({'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}}} if sqlite else None)
+    with app.app_context():
+        db.create_all()
+        if sqlite:
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        if db.session.get(UserDetails, "UID001") is None:
+            db.session.add(UserDetails(userid="UID001", username="bench", password="-",
+                                       email="bench@example.com", phone="bench"))
+            db.session.commit()
+    rng = random.Random(0)
+    records = [synthetic_record(rng) for _ in range(1000)]
+
+    def synchronous(count):
+        with app.app_context():
+            for n in range(count):
+                store_submissions([records[n % len(records)]])
+                db.session.commit()
+
+    buffer = SubmissionBuffer(app, batch_size=args.batch_size, flush_interval=0.5,
+                              spool_dir=tempfile.mkdtemp(prefix="petsurvey-spool-"))
+
+    def buffered(count):
+        for n in range(count):
+            if not buffer.submit(records[n % len(records)]):
+                raise RuntimeError("buffer full")
+
+    print(f"{'path':>12} {'submissions':>12} {'accepted/s':>11} {'stored/s':>9}")
+    stored, elapsed = run_threads(args.threads, args.submissions, synchronous)
+    print(f"{'synchronous':>12} {stored:>12} {stored / elapsed:>11.0f} {stored / elapsed:>9.0f}")
+
+    stored, accepted = run_threads(args.threads, args.submissions, buffered)
+    start = time.perf_counter()
+    buffer.close()
+    drained = accepted + time.perf_counter() - start
+    print(f"{'buffered':>12} {stored:>12} {stored / accepted:>11.0f} {stored / drained:>9.0f}")
+
+    with app.app_context():
+        total = db.session.execute(db.select(db.func.count()).select_from(UserResponses)).scalar()
+    print(f"rows in user_responses: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare the old ORM-based dashboard load with the columnar loader: wall time and peak memory.
+
+    python -m benchmarks.bench_loader [--rows 10000 100000] [--database-url URL]
+
+The old path is what admin_dashboard() did before the tallies: UserResponses.query.all(), one
+to_dict() per row, then pd.DataFrame. Peak memory is traced with tracemalloc (numpy and pandas
+report their buffers to it), so the numbers are comparable but not RSS; times come from a
+separate untraced run.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def measure(func):
+    """(result, seconds, peak MiB); timed on an untraced run since tracemalloc slows allocation."""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loader.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    import pandas as pd
+    from app import create_app
+    from analytics import aggregate_responses, load_responses
+    from benchmarks.synthetic import synthetic_responses
+    from extensions import db
+    from models import UserDetails, UserResponses
+
+    def orm_load():
+        frame = pd.DataFrame([response.to_dict() for response in UserResponses.query.all()])
+        db.session.expunge_all()  # like the end of a request, so the second run loads fresh objects
+        return frame
+
+    app = create_app()
+    print(f"{'rows':>10} {'path':>9} {'time (s)':>9} {'peak (MiB)':>11}")
+    with app.app_context():
+        db.create_all()
+        if db.session.get(UserDetails, "UID001") is None:
+            db.session.add(UserDetails(userid="UID001", username="bench", password="-",
+                                       email="bench@example.com", phone="bench"))
+        stored = 0
+        for rows in sorted(args.rows):
+            records = synthetic_responses(rows - stored, seed=rows).assign(userid="UID001",
+                                                                           useremail="bench@example.com")
+            db.session.execute(db.insert(UserResponses), records.to_dict("records"))
+            db.session.commit()
+            stored = rows
+
+            legacy, legacy_time, legacy_peak = measure(orm_load)
+            columnar, columnar_time, columnar_peak = measure(load_responses)
+            expected = aggregate_responses(legacy)
+            for field, (total, counts) in aggregate_responses(columnar).items():
+                assert (total, counts.to_dict()) == (expected[field][0], expected[field][1].to_dict()), field
+            print(f"{rows:>10} {'orm':>9} {legacy_time:>9.3f} {legacy_peak:>11.1f}")
+            print(f"{rows:>10} {'columnar':>9} {columnar_time:>9.3f} {columnar_peak:>11.1f}")
+            del legacy, columnar
+
+
+if __name__ == "__main__":
+    main()
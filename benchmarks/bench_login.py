@@ -0,0 +1,110 @@
+"""Login throughput and tail latency with hashing on the request thread vs in the credential pool.
+
+    python -m benchmarks.bench_login [--logins 8] [--bystanders 4] [--duration 15] [--workers 0 1 2]
+
+Each configuration serves the app in-process (one multi-threaded worker, like a gunicorn gthread
+worker) on a throwaway SQLite database. --logins clients POST the sign-in form in a loop while
+--bystanders clients load /signup, which does no hashing: their tail latency shows how much a
+login storm starves the rest of the worker. --workers 0 hashes on the request thread.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+
+
+def serve(workers, method, users):
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from benchmarks.common import serve as serve_app
+    from extensions import db
+    from models import UserDetails
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}},
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_TIMEOUT': 60,
+    })
+    with app.app_context():
+        db.create_all()
+        password = generate_password_hash("login-password", method)  # already current: no rehash on login
+        db.session.add_all(UserDetails(userid=f"UID{n:03d}", username=f"login{n}", email=f"login{n}@example.com",
+                                       phone=f"login{n}", password=password) for n in range(users))
+        db.session.commit()
+    app.extensions['credentials'].hash("warm-up")  # start the pool outside the measurement
+    return (app, *serve_app(app))
+
+
+def measure(base_url, logins, bystanders, duration, users):
+    from benchmarks.load import client, summarize
+
+    results = {"login": ([], [0]), "bystander": ([], [0])}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(kind, number):
+        opener = client(base_url)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if kind == "login":
+                    form = {"email": f"login{number % users}@example.com", "password": "login-password"}
+                    opener.open(f"{base_url}/", data=urllib.parse.urlencode(form).encode()).read()
+                else:
+                    opener.open(f"{base_url}/signup").read()
+                local.append(time.perf_counter() - start)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            results[kind][0].extend(local)
+            results[kind][1][0] += failed
+
+    threads = [threading.Thread(target=worker, args=("login", n)) for n in range(logins)]
+    threads += [threading.Thread(target=worker, args=("bystander", n)) for n in range(bystanders)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {kind: summarize(latencies, failed[0], elapsed) for kind, (latencies, failed) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--bystanders", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--method", help="default: the app's PASSWORD_HASH_METHOD default")
+    parser.add_argument("--json", type=argparse.FileType("w"), help="also write the results as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+    from credentials import DEFAULT_HASH_METHOD
+
+    method = args.method or DEFAULT_HASH_METHOD
+    report = {"method": method, "runs": []}
+    print(f"{'workers':>8} {'logins/s':>9} {'login p50':>10} {'login p99':>10} {'other p50':>10} {'other p99':>10}")
+    for workers in args.workers:
+        app, server, base_url = serve(workers, method, users=args.logins)
+        result = measure(base_url, args.logins, args.bystanders, args.duration, users=args.logins)
+        server.shutdown()
+        app.extensions['credentials'].close()
+        login, other = result["login"], result["bystander"]
+        print(f"{workers:>8} {login['rps']:>9.1f} {login['p50_ms']:>8.0f}ms {login['p99_ms']:>8.0f}ms "
+              f"{other['p50_ms']:>8.0f}ms {other['p99_ms']:>8.0f}ms")
+        report["runs"].append({"workers": workers, **result})
+    if args.json:
+        json.dump(report, args.json, indent=2)
+
+
+if __name__ == "__main__":
+    main()
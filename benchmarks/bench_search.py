@@ -0,0 +1,67 @@
+"""Time the indexed admin search against a LIKE scan over the free-text columns.
+
+    python -m benchmarks.bench_search [--responses 10000 100000] [--database-url URL]
+
+Each size is seeded (through store_submissions, so the index is built as /home builds it) into a
+throwaway SQLite database unless --database-url is given (sizes then add up). Times are best of --repeat: the total and
+term counts (computed once per change token), a first page of 20 hits with those counts cached, and the page after it.
+"""
+import argparse
+import os
+import tempfile
+
+QUERIES = ["paperwork", "trust*", '"too much paperwork"', 'cost "maybe, if"']
+TEXT_FIELDS = ("question2", "question4", "question5", "question6", "question7", "question8", "question9",
+               "question11")
+
+
+def like_scan(query, limit=20):
+    """What search looked like without the index: substring match on every free-text column."""
+    from sqlalchemy import func, or_
+    from extensions import db
+    from models import UserResponses
+
+    words = [word.strip('"*').lower() for word in query.replace('"', ' " ').split() if word.strip('"*')]
+    matches = [or_(*[func.lower(getattr(UserResponses, field)).contains(word) for field in TEXT_FIELDS])
+               for word in words]
+    page = db.session.execute(
+        db.select(UserResponses).where(*matches).order_by(UserResponses.id.desc()).limit(limit)).scalars().all()
+    total = db.session.execute(db.select(func.count()).select_from(UserResponses).where(*matches)).scalar()
+    return page, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--responses", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--database-url")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from benchmarks.common import best_of
+    from benchmarks.synthetic import seed_database
+    from extensions import db
+    import search
+
+    print(f"{'responses':>10} {'query':<24} {'hits':>7} {'LIKE scan (ms)':>15} {'counts':>9} {'first page':>11} "
+          f"{'next page':>10}")
+    for size in args.responses:
+        url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search.db')}"
+        app = create_app({'SQLALCHEMY_DATABASE_URI': url, 'SQLALCHEMY_ENGINE_OPTIONS': {}})
+        with app.app_context():
+            db.create_all()
+            seed_database(100, size)
+            for query in QUERIES:
+                first = search.search(query)
+                _, scan_time = best_of(args.repeat, like_scan, query)
+                _, counts_time = best_of(args.repeat, search.match_counts, search.parse_query(query))
+                _, first_time = best_of(args.repeat, search.search, query)
+                _, next_time = best_of(args.repeat, search.search, query, None, 20, first["next"])
+                print(f"{size:>10} {query:<24} {first['total']:>7} {scan_time * 1000:>15.1f} "
+                      f"{counts_time * 1000:>7.1f}ms {first_time * 1000:>9.1f}ms {next_time * 1000:>8.1f}ms")
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Measure cold worker startup: import + create_app() time and RSS, lazy vs PRELOAD_ANALYTICS.
+
+    python -m benchmarks.bench_startup [--runs 5]
+
+Each run is a fresh interpreter, so module caches are cold the way a respawned worker sees them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+startup = time.perf_counter() - start
+startup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import analytics
+first_dashboard = time.perf_counter() - start
+print(json.dumps({"startup": startup, "startup_rss": startup_rss, "first_dashboard": first_dashboard,
+                  "analytics_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def probe(preload):
+    env = dict(os.environ, PRELOAD_ANALYTICS="1" if preload else "0")
+    env.setdefault("DATABASE_URL", "sqlite://")
+    output = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'startup (s)':>12} {'RSS (MiB)':>10} {'1st dashboard import (s)':>25} {'RSS after (MiB)':>16}")
+    for preload in (False, True):
+        runs = [probe(preload) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{'preload' if preload else 'lazy':>8} {median['startup']:>12.3f} {median['startup_rss'] / 1024:>10.1f} "
+              f"{median['first_dashboard']:>25.3f} {median['analytics_rss'] / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
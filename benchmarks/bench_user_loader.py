@@ -0,0 +1,64 @@
+"""Count the SQL statements Flask-Login's user_loader costs per authenticated request.
+
+    python -m benchmarks.bench_user_loader [--requests 200]
+
+Compares untyped session ids (the old user-then-admin lookup), typed ids without the identity
+cache, and typed ids with it, for a survey user on /home and an admin on /admin/dashboard.
+"""
+import argparse
+import os
+import tempfile
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loader.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from extensions import db
+    from identity import identity_cache
+    from models import UserDetails, AdminDetails
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(UserDetails(userid="UID001", username="bench", email="bench@example.com", phone="1",
+                                   password=generate_password_hash("bench")))
+        db.session.add(AdminDetails(id=1, email="admin@example.com", password="admin"))
+        db.session.commit()
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *_: statements.append(1))
+
+    accounts = {  # who, path, typed session id, untyped (pre-upgrade) session id
+        "user": ("/home", "user:UID001", "UID001"),
+        "admin": ("/admin/dashboard", "admin:1", "1"),
+    }
+    print(f"{'account':>8} {'mode':>18} {'queries/request':>16} {'saved/request':>14}")
+    for account, (path, typed_id, legacy_id) in accounts.items():
+        baseline = None
+        for mode, session_id, cache_size in (("untyped, no cache", legacy_id, 0),
+                                             ("typed, no cache", typed_id, 0),
+                                             ("typed, cached", typed_id, 1024)):
+            identity_cache.clear()
+            identity_cache.maxsize = cache_size
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["_user_id"] = session_id
+                session["_fresh"] = True
+            statements.clear()
+            for _ in range(args.requests):
+                assert client.get(path).status_code == 200, (account, mode)
+            per_request = len(statements) / args.requests
+            baseline = per_request if baseline is None else baseline
+            print(f"{account:>8} {mode:>18} {per_request:>16.2f} {baseline - per_request:>14.2f}")
+    print(f"identity cache: {identity_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Helpers shared by the benchmarks: best-of-N timing and serving the app in-process."""
+import threading
+import time
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+def best_of(repeat, func, *args):
+    """(result of the last call, fastest of `repeat` calls in seconds)."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(app):
+    """Serve `app` on a free local port from a background thread; returns (server, base URL)."""
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
@@ -0,0 +1,253 @@
+"""Closed-loop HTTP load driver: N concurrent clients against a running app, results as JSON.
+
+Fixed paths, as a signed-in user:
+
+    python -m benchmarks.load --url http://127.0.0.1:8000 --concurrency 16 --duration 20 \
+        [--login EMAIL PASSWORD] [--path /home ...]
+
+The mixed survey scenario: every client signs up its own account, then loops over signup, signin,
+survey POST, /home, dashboard and figure GETs in --mix proportions (the last two only with --admin).
+--serve starts the app in-process on a throwaway SQLite database (or --database-url) seeded with
+--seed-responses synthetic responses and an admin account:
+
+    python -m benchmarks.load --scenario --serve --seed-responses 10000 --duration 20 [--output run.json]
+
+Latency percentiles are reported per operation and overall, together with the commit measured, so
+runs can be compared across commits.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+
+DEFAULT_MIX = {"signup": 1, "signin": 1, "survey": 4, "home": 2, "dashboard": 1, "figure": 1}
+SERVE_ADMIN = ("admin@bench.test", "bench-admin")
+
+
+def client(base_url, login=None, signin_path="/"):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    if login:
+        email, password = login
+        data = urllib.parse.urlencode({"email": email, "password": password}).encode()
+        opener.open(f"{base_url}{signin_path}", data=data).read()
+    return opener
+
+
+def summarize(latencies, errors, elapsed):
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 1),
+        "p95_ms": round(quantiles[94] * 1000, 1),
+        "p99_ms": round(quantiles[98] * 1000, 1),
+    }
+
+
+def measured_window(concurrency, duration):
+    """A barrier every client waits on once set up, and the clock its last arrival starts.
+
+    Signing up and in hashes passwords, so the window only opens when all clients are ready and
+    setup never counts towards the requests, rps or latencies reported.
+    """
+    clock = {}
+
+    def start():
+        clock["started"] = time.perf_counter()
+        clock["deadline"] = clock["started"] + duration
+
+    return threading.Barrier(concurrency, action=start), clock
+
+
+def run(base_url, paths, concurrency, duration, login=None):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    ready, clock = measured_window(concurrency, duration)
+
+    def worker(offset):
+        try:
+            opener = client(base_url, login)
+        finally:
+            ready.wait()
+        local, failed, n = [], 0, offset
+        while time.perf_counter() < clock["deadline"]:
+            start = time.perf_counter()
+            try:
+                opener.open(base_url + paths[n % len(paths)]).read()
+                local.append(time.perf_counter() - start)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+            n += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, sum(errors), time.perf_counter() - clock["started"])
+
+
+def run_scenario(base_url, concurrency, duration, mix=None, admin=None, seed=0):
+    """Mixed signup/signin/survey/dashboard traffic; returns {"operations": {...}, "total": {...}}."""
+    from benchmarks.synthetic import synthetic_form
+    from questions import QUESTION_FIELDS
+
+    mix = dict(mix or DEFAULT_MIX)
+    if admin is None:
+        mix.pop("dashboard", None)
+        mix.pop("figure", None)
+    operations, weights = list(mix), list(mix.values())
+    latencies, errors = defaultdict(list), defaultdict(int)
+    lock = threading.Lock()
+    ready, clock = measured_window(concurrency, duration)
+
+    def worker(number):
+        rng = random.Random(seed * 1000 + number)
+        local, failed = defaultdict(list), defaultdict(int)
+        user_opener = client(base_url)
+        admin_opener = client(base_url, admin, signin_path="/admin") if admin else None
+
+        def signup():
+            token = uuid.uuid4().hex[:15]  # email and phone must be unique across runs too
+            form = {"email": f"load-{token}@example.com", "username": f"load-{token}",
+                    "password": "load-password", "phone": token}
+            user_opener.open(f"{base_url}/signup", data=urllib.parse.urlencode(form).encode()).read()
+            return form["email"]
+
+        def request(operation):
+            if operation == "signup":
+                signup()
+            elif operation == "signin":
+                data = urllib.parse.urlencode({"email": email, "password": "load-password"}).encode()
+                user_opener.open(f"{base_url}/", data=data).read()
+            elif operation == "survey":
+                data = urllib.parse.urlencode(synthetic_form(rng), doseq=True).encode()
+                user_opener.open(f"{base_url}/home", data=data).read()
+            elif operation == "home":
+                user_opener.open(f"{base_url}/home").read()
+            elif operation == "dashboard":
+                admin_opener.open(f"{base_url}/admin/dashboard").read()
+            elif operation == "figure":
+                admin_opener.open(f"{base_url}/admin/dashboard/figures/{rng.choice(QUESTION_FIELDS)}").read()
+
+        try:
+            email = signup()  # every client starts signed in to an account of its own
+            request("signin")
+        finally:
+            ready.wait()
+        while time.perf_counter() < clock["deadline"]:
+            operation = rng.choices(operations, weights)[0]
+            start = time.perf_counter()
+            try:
+                request(operation)
+                local[operation].append(time.perf_counter() - start)
+            except (urllib.error.URLError, ConnectionError):
+                failed[operation] += 1
+        with lock:
+            for operation, values in local.items():
+                latencies[operation].extend(values)
+            for operation, count in failed.items():
+                errors[operation] += count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - clock["started"]
+
+    return {
+        "operations": {operation: summarize(latencies[operation], errors[operation], elapsed)
+                       for operation in operations},
+        "total": summarize([value for values in latencies.values() for value in values],
+                           sum(errors.values()), elapsed),
+    }
+
+
+def serve(database_url, seed_responses, seed_users):
+    """Start the app on a free local port in a background thread; returns its base URL."""
+    from werkzeug.security import generate_password_hash
+
+    sqlite = database_url is None
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from benchmarks.common import serve as serve_app
+    from benchmarks.synthetic import seed_database
+    from extensions import db
+    from models import AdminDetails
+
+    app = create_app({'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}}} if sqlite else None)
+    with app.app_context():
+        db.create_all()
+        if sqlite:
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        if db.session.execute(db.select(AdminDetails).where(AdminDetails.email == SERVE_ADMIN[0])).scalar() is None:
+            db.session.add(AdminDetails(email=SERVE_ADMIN[0], password=generate_password_hash(SERVE_ADMIN[1])))
+            db.session.commit()
+        seed_database(seed_users, seed_responses)
+
+    return serve_app(app)[1]
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", dest="paths", action="append", help="default: /")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--login", nargs=2, metavar=("EMAIL", "PASSWORD"))
+    parser.add_argument("--scenario", action="store_true", help="run the mixed survey scenario instead of --path")
+    parser.add_argument("--mix", type=json.loads, help=f"operation weights as JSON, default {json.dumps(DEFAULT_MIX)}")
+    parser.add_argument("--admin", nargs=2, metavar=("EMAIL", "PASSWORD"), help="enables dashboard operations")
+    parser.add_argument("--serve", action="store_true", help="serve the app in-process instead of using --url")
+    parser.add_argument("--database-url", help="with --serve, default: a throwaway SQLite file")
+    parser.add_argument("--seed-responses", type=int, default=0)
+    parser.add_argument("--seed-users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=argparse.FileType("w"), default="-")
+    args = parser.parse_args()
+
+    base_url, admin = args.url.rstrip("/"), args.admin
+    if args.serve:
+        base_url = serve(args.database_url, args.seed_responses, args.seed_users)
+        admin = admin or SERVE_ADMIN
+
+    if args.scenario:
+        result = run_scenario(base_url, args.concurrency, args.duration, args.mix, admin, args.seed)
+    else:
+        result = run(base_url, args.paths or ["/"], args.concurrency, args.duration, args.login)
+    result.update(commit=current_commit(), url=base_url, concurrency=args.concurrency, duration=args.duration,
+                  served=args.serve, seed_responses=args.seed_responses if args.serve else None)
+    json.dump(result, args.output, indent=2 if args.scenario else None)
+    args.output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Hammer /signup from parallel clients and check every account got a distinct user id.
+
+    python -m benchmarks.stress_signup [--threads 16] [--signups 50] [--database-url URL]
+
+Without --database-url a throwaway SQLite file is used.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--signups", type=int, default=50, help="signups per thread")
+    parser.add_argument("--database-url")
+    parser.add_argument("--seed-users", type=int, default=998,
+                        help="pre-existing UID### rows, so the run crosses UID999 -> UID1000")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="petsurvey-stress-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "stress")
+
+    from app import create_app
+    from extensions import db
+    from models import UserDetails
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if args.database_url is None:
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        db.session.add_all(UserDetails(userid=f"UID{n:03d}", username=f"seed{n}", password="-",
+                                       email=f"seed{n}@stress.test", phone=f"seed{n}")
+                           for n in range(1, args.seed_users + 1))
+        db.session.commit()
+
+    failures = Counter()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(thread):
+        client = app.test_client()
+        barrier.wait()
+        for n in range(args.signups):
+            response = client.post("/signup", data={
+                "email": f"t{thread}-{n}@stress.test", "username": f"t{thread}-{n}",
+                "password": "stress-password", "phone": f"{thread:04d}{n:06d}",
+            })
+            if response.status_code != 302:
+                failures[response.status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        userids = db.session.execute(db.select(UserDetails.userid)).scalars().all()
+    expected = args.seed_users + args.threads * args.signups
+    duplicates = len(userids) - len(set(userids))
+
+    print(f"signups: {args.threads * args.signups} in {elapsed:.2f}s "
+          f"({args.threads * args.signups / elapsed:.0f}/s) across {args.threads} threads")
+    print(f"users: {len(userids)} (expected {expected}), duplicate ids: {duplicates}, "
+          f"failed requests: {dict(failures) or 0}")
+    highest = max(int(userid[3:]) for userid in userids)
+    print(f"highest id: UID{highest:03d}")
+    if duplicates or failures or len(userids) != expected or highest != expected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
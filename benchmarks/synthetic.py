@@ -0,0 +1,123 @@
+"""Seed a database with synthetic accounts and survey responses drawn from the home.html options.
+
+    python -m benchmarks.synthetic --users 1000 --responses 100000 [--seed 0] [--database-url URL]
+
+Accounts are bench<N>@example.com with password "bench-password". Responses go through
+store_submissions(), so response_answers and the tallies match what /home would have written.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+from ingest import CHECKBOX_FIELDS
+from questions import OTHERS, ANSWER_SEPARATOR, QUESTIONS
+
+FREE_TEXT = ["Cost", "Too much paperwork", "no trustworthy listings", "Yes", "No", "maybe, if it is free",
+             "Shelters far away", "YES", "Distance", "Not sure"]
+BENCH_PASSWORD = "bench-password"
+
+
+def synthetic_choice(spec, rng):
+    """(picked choices, "Others" text or None), or ([free text], None) for textarea questions."""
+    if not spec.choices:
+        return [rng.choice(FREE_TEXT)], None
+    if spec.field in CHECKBOX_FIELDS:
+        picked = rng.sample(spec.choices, rng.randint(1, 3))
+        picked.sort(key=spec.choices.index)  # browsers submit checkboxes in form order
+    else:
+        picked = [rng.choice(spec.choices)]
+    return picked, rng.choice(FREE_TEXT) if OTHERS in picked else None
+
+
+def synthetic_answer(spec, rng):
+    """One stored answer, joined the way home() joins the form fields."""
+    picked, other = synthetic_choice(spec, rng)
+    answer = ANSWER_SEPARATOR.join(picked)
+    if other:
+        answer += ANSWER_SEPARATOR + other
+    return answer
+
+
+def synthetic_form(rng):
+    """Form fields for one POST /home, as the browser would send them."""
+    form = {}
+    for spec in QUESTIONS:
+        number = spec.field[len("question"):]
+        picked, other = synthetic_choice(spec, rng)
+        form[f"answer{number}"] = picked if spec.field in CHECKBOX_FIELDS else picked[0]
+        if other:
+            form[f"other_q{number}"] = other
+    return form
+
+
+def synthetic_responses(rows, seed=0):
+    """DataFrame of `rows` responses, resampled from a pool of 5000 so answers repeat like real ones."""
+    rng = random.Random(seed)
+    pool = [{spec.field: synthetic_answer(spec, rng) for spec in QUESTIONS} for _ in range(min(rows, 5000))]
+    return pd.DataFrame([pool[rng.randrange(len(pool))] for _ in range(rows)])
+
+
+def seed_database(users, responses, seed=0, batch_size=1000, progress=None):
+    """Add `users` accounts and `responses` responses spread over them; needs an app context."""
+    from werkzeug.security import generate_password_hash
+    from extensions import db
+    from ingest import store_submissions
+    from models import UserDetails
+    from user_ids import USER_ID_PREFIX, highest_user_id_number, sync_user_id_counter
+
+    rng = random.Random(seed)
+    password = generate_password_hash(BENCH_PASSWORD)  # hashed once, shared by every account
+    first = highest_user_id_number() + 1
+    accounts = [(f"{USER_ID_PREFIX}{n:03d}", f"bench{n}@example.com") for n in range(first, first + users)]
+    for start in range(0, len(accounts), batch_size):
+        db.session.execute(db.insert(UserDetails), [
+            {"userid": userid, "username": f"bench{userid}", "email": email, "password": password,
+             "phone": f"bench{userid}"}
+            for userid, email in accounts[start:start + batch_size]])
+        db.session.commit()
+    sync_user_id_counter()
+
+    pool = accounts or [("UID001", "bench@example.com")]
+    for start in range(0, responses, batch_size):
+        records = []
+        for _ in range(min(batch_size, responses - start)):
+            userid, email = rng.choice(pool)
+            record = {"userid": userid, "useremail": email}
+            record.update({spec.field: synthetic_answer(spec, rng) for spec in QUESTIONS})
+            records.append(record)
+        store_submissions(records)
+        db.session.commit()
+        if progress:
+            progress(start + len(records))
+    return len(accounts), responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--responses", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or os.environ.get("DATABASE_URL") or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'synthetic.db')}"
+    os.environ.setdefault("APP_SECRET_KEY", "bench")
+
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        seed_database(args.users, args.responses, args.seed,
+                      progress=lambda done: print(f"\r{done}/{args.responses} responses", end="", flush=True))
+    print(f"\nSeeded {args.users} users and {args.responses} responses into {os.environ['DATABASE_URL']} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import csv
+import json
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+from models import UserDetails
+from questions import QUESTION_FIELDS
+from ingest import form_record, store_submissions, validate_submission
+
+
+IMPORT_FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 2000   # rows per executemany
+IMPORT_CHUNK_SIZE = 20000  # rows per transaction
+
+
+class BulkImportError(Exception):
+    pass
+
+
+def read_rows(lines, import_format):
+    """(line number, row, error or None) for each record of a CSV or JSONL file; unparseable rows carry an error."""
+    if import_format == "jsonl":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, line.rstrip("\n"), f"invalid JSON: {e}"
+                continue
+            yield number, row, None if isinstance(row, dict) else "expected a JSON object"
+    elif import_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row, "more cells than header columns" if None in row else None
+    else:
+        raise BulkImportError(f"Unsupported import format {import_format!r}")
+
+
+def row_record(row):
+    """The response record for one input row.
+
+    Rows hold the form fields home() receives (answerN, possibly lists for checkboxes, and
+    other_qN) and get the same normalization; rows with only questionN columns, such as
+    `flask export-responses` output, are taken as already stored. Other columns are ignored.
+    """
+    userid, useremail = row.get("userid") or None, row.get("useremail") or None
+    if not any(key.startswith("answer") for key in row) and any(field in row for field in QUESTION_FIELDS):
+        record = {field: row.get(field) if row.get(field) != "" else None for field in QUESTION_FIELDS}
+        return {"userid": userid, "useremail": useremail, **record}
+    return form_record(row, userid, useremail)
+
+
+def import_responses(rows, batch_size=IMPORT_BATCH_SIZE, chunk_size=IMPORT_CHUNK_SIZE, reject=None, progress=None,
+                     dry_run=False):
+    """Validate and store rows from read_rows(); returns (rows read, imported, rejected).
+
+    Records go through store_submissions() `batch_size` at a time, so answers, search postings and
+    tallies stay in step, and are committed every `chunk_size` rows. A chunk the database refuses
+    is replayed row by row so only the offending rows are rejected. `reject(line, row, errors)`
+    gets every rejected row and `progress(read, imported, rejected)` is called after each commit.
+    """
+    emails = {}  # userid -> account email, None for unknown ids
+    read = imported = rejected = 0
+    batch, chunk = [], []
+
+    def reject_row(line, row, errors):
+        nonlocal rejected
+        rejected += 1
+        if reject:
+            reject(line, row, errors)
+
+    def check_batch():
+        unknown = {record["userid"] for _, _, record in batch if isinstance(record["userid"], str)} - emails.keys()
+        if unknown:
+            emails.update(dict.fromkeys(unknown))
+            emails.update(db.session.execute(
+                db.select(UserDetails.userid, UserDetails.email).where(UserDetails.userid.in_(unknown))).all())
+        for line, row, record in batch:
+            email = emails.get(record["userid"]) if isinstance(record["userid"], str) else None
+            record["useremail"] = record["useremail"] or email  # home() stores the account's email
+            errors = validate_submission(record)
+            if email is None and isinstance(record["userid"], str):
+                errors.append(f"userid {record['userid']!r} is not a registered user")
+            if errors:
+                reject_row(line, row, errors)
+            else:
+                chunk.append((line, row, record))
+        batch.clear()
+
+    def commit():
+        nonlocal imported
+        if dry_run:
+            imported += len(chunk)
+        else:
+            try:
+                for start in range(0, len(chunk), batch_size):
+                    store_submissions([record for _, _, record in chunk[start:start + batch_size]])
+                db.session.commit()
+                imported += len(chunk)
+            except SQLAlchemyError:
+                db.session.rollback()
+                for line, row, record in chunk:
+                    try:
+                        store_submissions([record])
+                        db.session.commit()
+                        imported += 1
+                    except SQLAlchemyError as e:
+                        db.session.rollback()
+                        reject_row(line, row, [f"database: {getattr(e, 'orig', None) or e}"])
+        chunk.clear()
+        if progress:
+            progress(read, imported, rejected)
+
+    for line, row, error in rows:
+        read += 1
+        if error:
+            reject_row(line, row, [error])
+            continue
+        try:
+            record = row_record(row)
+        except TypeError:  # e.g. a number in a checkbox list
+            reject_row(line, row, ["answers must be text, or lists of text for checkbox questions"])
+            continue
+        batch.append((line, row, record))
+        if len(batch) >= batch_size:
+            check_batch()
+            if len(chunk) >= chunk_size:
+                commit()
+    check_batch()
+    commit()
+    return read, imported, rejected
@@ -0,0 +1,198 @@
+import json
+import sys
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from extensions import db
+from questions import QUESTIONS
+from export import EXPORT_FORMATS, ExportError, export_chunks, export_partitions
+from tallies import rebuild_tallies
+from answers import backfill_answers
+from search import rebuild_search_index
+from user_ids import sync_user_id_counter
+from schema import create_missing_indexes, widen_columns
+from snapshots import FileSnapshotCache, SnapshotPublisher
+from models import AdminDetails
+from credentials import is_password_hash
+from assets import ASSET_BUILD_DIR, build_assets
+from bulk_import import IMPORT_BATCH_SIZE, IMPORT_CHUNK_SIZE, IMPORT_FORMATS, BulkImportError, import_responses, \
+    read_rows
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create any missing tables and indexes, widen columns that have grown and seed the user id counter."""
+    db.create_all()
+    for column in widen_columns():
+        click.echo(f"Widened {column}")
+    for index in create_missing_indexes():
+        click.echo(f"Created index {index}")
+    click.echo(f"Database ready, next user id: {sync_user_id_counter()}")
+
+
+@click.command("rebuild-tallies")
+@click.option("--source", type=click.Choice(["answers", "responses"]), default="answers",
+              help="Count response_answers in the database, or stream user_responses through pandas.")
+@with_appcontext
+def rebuild_tallies_command(source):
+    """Recompute response_tally."""
+    tallies, rows = rebuild_tallies(source)
+    if rows is None:
+        click.echo(f"Rebuilt {tallies} tallies inside the database.")
+    else:
+        click.echo(f"Rebuilt {tallies} tallies from {rows} responses.")
+
+
+@click.command("backfill-answers")
+@with_appcontext
+def backfill_answers_command():
+    """Write response_answers rows for responses stored before that table existed."""
+    click.echo(f"Backfilled answers for {backfill_answers()} responses.")
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild search_postings from user_responses (new submissions are indexed as they are stored)."""
+    click.echo(f"Indexed {rebuild_search_index()} responses.")
+
+
+@click.command("seed-userid-counter")
+@with_appcontext
+def seed_userid_counter_command():
+    """Point the user id counter past the highest existing UID### (run once after upgrading)."""
+    click.echo(f"Next user id: {sync_user_id_counter()}")
+
+
+@click.command("export-responses")
+@click.option("--format", "export_format", type=click.Choice(list(EXPORT_FORMATS)), default="csv")
+@click.option("--output", type=click.File("wb"), default="-", help="Output file, stdout by default.")
+@click.option("--min-id", type=int)
+@click.option("--max-id", type=int)
+@click.option("--userid")
+@click.option("--useremail")
+@with_appcontext
+def export_responses_command(export_format, output, min_id, max_id, userid, useremail):
+    """Stream user_responses to a CSV, JSONL or Parquet file."""
+    try:
+        chunks = export_chunks(export_format, export_partitions(min_id, max_id, userid, useremail))
+    except ExportError as e:
+        raise click.ClickException(str(e))
+    for chunk in chunks:
+        output.write(chunk)
+
+
+@click.command("import-responses")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option("--format", "import_format", type=click.Choice(IMPORT_FORMATS),
+              help="Default: from the file extension.")
+@click.option("--rejects", type=click.Path(dir_okay=False),
+              help="JSONL file for rejected rows with their errors, SOURCE.rejected.jsonl by default.")
+@click.option("--batch-size", type=click.IntRange(1), default=IMPORT_BATCH_SIZE, help="Rows per executemany.")
+@click.option("--chunk-size", type=click.IntRange(1), default=IMPORT_CHUNK_SIZE, help="Rows per transaction.")
+@click.option("--dry-run", is_flag=True, help="Validate and write the rejects without storing anything.")
+@with_appcontext
+def import_responses_command(source, import_format, rejects, batch_size, chunk_size, dry_run):
+    """Load survey responses from a JSONL or CSV file, normalized and validated like /home submissions."""
+    import_format = import_format or source.rpartition(".")[2].lower()
+    if import_format not in IMPORT_FORMATS:
+        raise click.ClickException(f"Can't tell the format of {source}, pass --format")
+    rejects = rejects or ("rejected.jsonl" if source == "-" else f"{source}.rejected.jsonl")
+    rejects_file = None
+    started = time.perf_counter()
+
+    def reject(line, row, errors):
+        nonlocal rejects_file
+        if rejects_file is None:
+            rejects_file = open(rejects, "w", encoding="utf-8")
+        rejects_file.write(json.dumps({"line": line, "errors": errors, "row": row}) + "\n")
+
+    def progress(read, imported, rejected):
+        rate = read / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"\r{read} rows read, {imported} imported, {rejected} rejected ({rate:.0f} rows/s)",
+                   nl=False, err=True)
+
+    lines = sys.stdin if source == "-" else open(source, newline="", encoding="utf-8-sig")
+    try:
+        read, imported, rejected = import_responses(read_rows(lines, import_format), batch_size, chunk_size,
+                                                    reject, progress, dry_run)
+    except BulkImportError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if rejects_file is not None:
+            rejects_file.close()
+    click.echo(err=True)
+    verb = "Validated" if dry_run else "Imported"
+    click.echo(f"{verb} {imported} of {read} rows in {time.perf_counter() - started:.1f}s"
+               + (f", {rejected} rejected: see {rejects}" if rejected else ""))
+
+
+@click.command("precompute-dashboard")
+@click.option("--interval", type=float, default=5.0, help="Seconds between checks for new responses.")
+@click.option("--once", is_flag=True, help="Publish the current snapshot and exit.")
+@with_appcontext
+def precompute_dashboard_command(interval, once):
+    """Keep the dashboard figures rendered in the shared snapshot cache as responses arrive."""
+    cache = current_app.extensions.get('dashboard_cache')
+    if not isinstance(cache, FileSnapshotCache):
+        raise click.ClickException("precompute-dashboard publishes to files: set DASHBOARD_CACHE=file "
+                                   "(and the same DASHBOARD_CACHE_DIR as the web workers)")
+    if cache.maxsize <= len(QUESTIONS):
+        raise click.ClickException(f"DASHBOARD_CACHE_SIZE must hold a full set of {len(QUESTIONS) + 1} snapshots")
+
+    publisher = SnapshotPublisher(cache)
+    while True:
+        start = time.perf_counter()
+        if publisher.publish():
+            click.echo(f"Published dashboard {publisher.token} in {time.perf_counter() - start:.2f}s")
+        db.session.remove()  # end the transaction so the next check sees new rows
+        if once:
+            return
+        time.sleep(interval)
+
+
+@click.command("create-admin")
+@click.argument("email")
+@click.password_option()
+@with_appcontext
+def create_admin_command(email, password):
+    """Add an admin account, or reset an existing admin's password."""
+    admin = db.session.execute(db.select(AdminDetails).where(AdminDetails.email == email)).scalar()
+    if admin is None:
+        admin = AdminDetails(email=email)
+        db.session.add(admin)
+    admin.password = current_app.extensions['credentials'].hash(password)
+    db.session.commit()
+    click.echo(f"Admin {email} saved.")
+
+
+@click.command("hash-admin-passwords")
+@with_appcontext
+def hash_admin_passwords_command():
+    """Replace plaintext admin passwords with hashes (admins are also upgraded on their next login)."""
+    credentials = current_app.extensions['credentials']
+    admins = [admin for admin in db.session.execute(db.select(AdminDetails)).scalars()
+              if admin.password and not is_password_hash(admin.password)]
+    for admin in admins:
+        admin.password = credentials.hash(admin.password)
+    db.session.commit()
+    click.echo(f"Hashed {len(admins)} plaintext admin passwords.")
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress static/ (and the plotly bundle) for /assets/; restart workers afterwards."""
+    from views import PLOTLY_ASSET, PLOTLY_JS
+
+    manifest = build_assets(current_app.static_folder, extra={PLOTLY_ASSET: PLOTLY_JS})
+    click.echo(f"Built {len(manifest)} assets into {current_app.static_folder}/{ASSET_BUILD_DIR}")
+
+
+COMMANDS = [init_db_command, rebuild_tallies_command, backfill_answers_command, rebuild_search_index_command,
+            seed_userid_counter_command, export_responses_command, import_responses_command,
+            precompute_dashboard_command, create_admin_command, hash_admin_passwords_command, build_assets_command]
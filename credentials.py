@@ -0,0 +1,116 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+import atexit
+import hmac
+import multiprocessing
+import os
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+DEFAULT_HASH_METHOD = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+
+
+class CredentialServiceBusy(Exception):
+    """Every hashing slot stayed taken for the whole timeout; the caller should answer 503."""
+
+
+def normalize_method(method):
+    """Spell a werkzeug hash method out with its parameters, as stored hashes carry them."""
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD {method!r}")
+
+
+def is_password_hash(stored):
+    """True for a werkzeug "method$salt$hash" with a method we know; anything else is a legacy plaintext password."""
+    parts = stored.split("$")
+    if len(parts) != 3 or not all(parts):
+        return False
+    try:
+        normalize_method(parts[0])
+    except ValueError:
+        return False
+    return True
+
+
+class CredentialService:
+    """Password hashing run in a small process pool, so a login storm can't starve a worker's threads.
+
+    At most `workers` hashes run at once (`max_pending` may queue behind them); a caller that gets
+    no slot within `timeout` seconds gets CredentialServiceBusy. With `workers=0` hashing runs on
+    the calling thread. The pool is created lazily per process (spawned, not forked: forking a
+    threaded gunicorn worker is unsafe) and shut down at exit.
+    """
+
+    def __init__(self, method=DEFAULT_HASH_METHOD, salt_length=16, workers=2, max_pending=None, timeout=10.0):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = BoundedSemaphore(max_pending or max(workers, 1) * 4)
+        self.lock = Lock()
+        self.pool = None
+        self.pid = None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored, password):
+        """Check `password` against a stored hash (or a legacy plaintext value, compared in constant time)."""
+        if not stored or not password:
+            return False
+        if not is_password_hash(stored):
+            return hmac.compare_digest(stored.encode(), password.encode())
+        try:
+            return self._run(check_password_hash, stored, password)
+        except ValueError:  # e.g. a digest this hashlib doesn't have
+            return False
+
+    def needs_rehash(self, stored):
+        """True for plaintext and for hashes made with other parameters than the configured ones."""
+        if not is_password_hash(stored):
+            return True
+        method, salt, _ = stored.split("$")
+        return normalize_method(method) != self.method or len(salt) < self.salt_length
+
+    def verify_and_update(self, account, password):
+        """Verify an account's password and upgrade its stored hash if needed; the caller commits."""
+        if not self.verify(account.password, password):
+            return False
+        if self.needs_rehash(account.password):
+            account.password = self.hash(password)
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.pool is not None and self.pid == os.getpid():
+                self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def _run(self, function, *args):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise CredentialServiceBusy("password hashing is saturated")
+        try:
+            if self.workers <= 0:
+                return function(*args)
+            try:
+                return self._executor().submit(function, *args).result(timeout=self.timeout)
+            except FutureTimeout:
+                raise CredentialServiceBusy("password hashing timed out") from None
+        finally:
+            self.slots.release()
+
+    def _executor(self):
+        if self.pid != os.getpid():  # a forked child must not reuse the parent's pool
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                    self.pid = os.getpid()
+                    atexit.register(self.close)
+        return self.pool
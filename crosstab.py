@@ -0,0 +1,148 @@
+from threading import Lock
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from analytics import load_responses
+from cache import LRUCache
+from models import UserResponses
+from questions import QUESTION_FIELDS, QUESTIONS_BY_FIELD
+from snapshots import change_token
+from metrics import span
+
+
+class CrosstabError(Exception):
+    """A crosstab request names an unknown question or a malformed filter."""
+
+
+def option_incidence(column, spec):
+    """(option labels, categories x options count matrix): which options each distinct answer counts towards."""
+    index = {}
+    cells = ([], [])
+    for code, answer in enumerate(column.cat.categories):
+        for option in spec.options(answer):
+            cells[0].append(code)
+            cells[1].append(index.setdefault(option, len(index)))
+    matrix = np.zeros((len(column.cat.categories), len(index)), dtype=np.int64)
+    np.add.at(matrix, cells, 1)
+    return list(index), matrix
+
+
+def segment_mask(frame, filters):
+    """Rows matching every {field: [options]} filter (any of the options within one field)."""
+    mask = np.ones(len(frame), dtype=bool)
+    for field, wanted in filters.items():
+        spec = QUESTIONS_BY_FIELD[field]
+        labels, incidence = option_incidence(frame[field], spec)
+        wanted = {option.lower() if spec.lowercase else option for option in wanted}
+        selected = [position for position, label in enumerate(labels) if label in wanted]
+        allowed = np.append(incidence[:, selected].any(axis=1), False)  # trailing False for missing (-1)
+        mask &= allowed[frame[field].cat.codes.to_numpy()]
+    return mask
+
+
+def crosstab_counts(frame, rows, columns=None, filters=None):
+    """Count responses by option of `rows` (and `columns`) within the filtered segment.
+
+    Answers are counted per distinct (row answer, column answer) code pair with one bincount, then
+    projected onto options through the incidence matrices, so parsing runs once per distinct answer
+    and multi-select answers count towards every option they contain.
+    """
+    mask = segment_mask(frame, filters or {})
+    row_labels, row_incidence = option_incidence(frame[rows], QUESTIONS_BY_FIELD[rows])
+    row_codes = frame[rows].cat.codes.to_numpy()
+    result = {"responses": int(mask.sum())}
+
+    if columns is None:
+        valid = mask & (row_codes >= 0)
+        counts = np.bincount(row_codes[valid], minlength=row_incidence.shape[0]) @ row_incidence
+        order = np.argsort(-counts, kind="stable")
+        result.update(rows=rows, row_labels=[row_labels[i] for i in order], counts=counts[order].tolist())
+        return result
+
+    column_labels, column_incidence = option_incidence(frame[columns], QUESTIONS_BY_FIELD[columns])
+    column_codes = frame[columns].cat.codes.to_numpy()
+    valid = mask & (row_codes >= 0) & (column_codes >= 0)
+    width = column_incidence.shape[0]
+    pairs = np.bincount(row_codes[valid].astype(np.int64) * width + column_codes[valid],
+                        minlength=row_incidence.shape[0] * width).reshape(row_incidence.shape[0], width)
+    table = row_incidence.T @ pairs @ column_incidence
+
+    row_order = np.argsort(-table.sum(axis=1), kind="stable")
+    column_order = np.argsort(-table.sum(axis=0), kind="stable")
+    result.update(rows=rows, columns=columns,
+                  row_labels=[row_labels[i] for i in row_order],
+                  column_labels=[column_labels[i] for i in column_order],
+                  counts=table[np.ix_(row_order, column_order)].tolist())
+    return result
+
+
+class ResponseColumns:
+    """Every question column of user_responses held in memory as categoricals, kept current by change token.
+
+    New rows are appended by loading only ids past the last one seen; if the row count doesn't add
+    up (deletions, or an id committed out of order) the columns are reloaded in full.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.frame = None
+        self.token = None
+        self.max_id = 0
+
+    def current(self):
+        token = change_token()
+        with self.lock:
+            if token != self.token:
+                self._refresh(token)
+            return token, self.frame
+
+    def _refresh(self, token):
+        max_id, rows = (int(part) for part in token.split("-"))
+        if self.frame is not None and max_id >= self.max_id:
+            appended = load_responses(criteria=[UserResponses.id > self.max_id, UserResponses.id <= max_id])
+            if len(self.frame) + len(appended) == rows:
+                self.frame = pd.DataFrame({
+                    field: union_categoricals([self.frame[field], appended[field]]) for field in QUESTION_FIELDS
+                })
+                self.token, self.max_id = token, max_id
+                return
+        self.frame = load_responses(criteria=[UserResponses.id <= max_id])
+        # a mismatch means rows changed between the two queries; reload again next time
+        self.token = token if len(self.frame) == rows else None
+        self.max_id = max_id
+
+
+response_columns = ResponseColumns()
+query_cache = LRUCache(maxsize=256, ttl=3600)
+
+
+def parse_filters(where):
+    """["question1:1-3 years", ...] -> {field: [options]}."""
+    filters = {}
+    for condition in where:
+        field, separator, option = condition.partition(":")
+        if not separator or field not in QUESTIONS_BY_FIELD:
+            raise CrosstabError(f"Filters look like question1:<option>, got {condition!r}")
+        filters.setdefault(field, []).append(option)
+    return filters
+
+
+def crosstab_query(rows, columns=None, where=()):
+    """Crosstab of the current responses, cached per (change token, query)."""
+    if rows is None:
+        raise CrosstabError("rows is required")
+    for field in (rows, columns):
+        if field is not None and field not in QUESTIONS_BY_FIELD:
+            raise CrosstabError(f"Unknown question {field!r}, expected one of {', '.join(QUESTION_FIELDS)}")
+    filters = parse_filters(where)
+
+    with span("crosstab.load"):
+        token, frame = response_columns.current()
+    key = repr((token, rows, columns, sorted((field, sorted(options)) for field, options in filters.items())))
+    result = query_cache.get(key)
+    if result is None:
+        with span("crosstab.count"):
+            result = dict(crosstab_counts(frame, rows, columns, filters), token=token)
+        query_cache.set(key, result)
+    return result
+
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from extensions import db
+from models import UserResponses
+from questions import QUESTION_FIELDS
+
+
+EXPORT_COLUMNS = ["id", "userid", "useremail", *QUESTION_FIELDS]
+EXPORT_FORMATS = {  # format -> (mimetype, file extension)
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+EXPORT_CHUNK_SIZE = 5000
+
+
+class ExportError(Exception):
+    pass
+
+
+def csv_chunks(partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only, no rows
+        yield buffer.getvalue().encode()
+
+
+def jsonl_chunks(partitions):
+    for rows in partitions:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows).encode()
+
+
+class _ChunkSink(io.RawIOBase):  # write-only file that hands back whatever was written since the last drain
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_chunks(partitions):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    return _parquet_stream(partitions, pa, pq)
+
+
+def _parquet_stream(partitions, pa, pq):
+    schema = pa.schema([("id", pa.int64())] + [(column, pa.string()) for column in EXPORT_COLUMNS[1:]])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in partitions:  # one row group per partition, flushed as soon as it is written
+            writer.write_table(pa.Table.from_pylist([dict(zip(EXPORT_COLUMNS, row)) for row in rows], schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_chunks(export_format, partitions):
+    """Encode partitions (lists of EXPORT_COLUMNS tuples) as a stream of bytes chunks."""
+    if export_format == "csv":
+        return csv_chunks(partitions)
+    if export_format == "jsonl":
+        return jsonl_chunks(partitions)
+    if export_format == "parquet":
+        return parquet_chunks(partitions)
+    raise ExportError(f"Unknown export format {export_format!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def export_partitions(min_id=None, max_id=None, userid=None, useremail=None):
+    """Stream user_responses as lists of EXPORT_COLUMNS tuples through a server-side cursor."""
+    query = db.select(*[getattr(UserResponses, column) for column in EXPORT_COLUMNS]).order_by(UserResponses.id)
+    if min_id is not None:
+        query = query.where(UserResponses.id >= min_id)
+    if max_id is not None:
+        query = query.where(UserResponses.id <= max_id)
+    if userid:
+        query = query.where(UserResponses.userid == userid)
+    if useremail:
+        query = query.where(UserResponses.useremail == useremail)
+
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
@@ -0,0 +1,52 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import shutil
+import tempfile
+from os import environ, path
+
+bind = f"0.0.0.0:{environ.get('PORT', '8000')}"
+
+# The survey routes spend their time waiting on the database, so each worker process runs a
+# thread pool (gthread) instead of handling one request at a time.
+workers = int(environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(environ.get("WEB_THREADS", 4))
+timeout = int(environ.get("WEB_TIMEOUT", 30))
+keepalive = 5
+max_requests = int(environ.get("WEB_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+
+# Load the app (and pandas/plotly) once in the master; forked workers share those pages.
+preload_app = True
+environ.setdefault("PRELOAD_ANALYTICS", "1")
+
+accesslog = environ.get("WEB_ACCESS_LOG", "-")
+
+# With METRICS on, workers sum their histograms through this directory, so a scrape of /metrics
+# covers every worker whichever one answers it.
+environ.setdefault("METRICS_DIR", path.join(tempfile.gettempdir(), "petsurvey-metrics"))
+
+
+def on_starting(server):
+    # series from a previous run would be added to this one's
+    shutil.rmtree(environ["METRICS_DIR"], ignore_errors=True)
+
+
+def post_fork(server, worker):
+    # never share pooled connections a preloaded master may have opened with its children
+    from wsgi import app
+    from extensions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # flush write-behind survey submissions before the worker goes away
+    from wsgi import app
+
+    buffer = app.extensions.get("submission_buffer")
+    if buffer is not None:
+        buffer.close()
+    app.extensions["credentials"].close()  # and stop its password hashing processes
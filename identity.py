@@ -0,0 +1,45 @@
+from sqlalchemy import event
+from extensions import db, login_manager
+from cache import LRUCache
+from models import UserDetails, AdminDetails
+
+
+# Detached UserDetails/AdminDetails keyed by session id. Each worker process has its own copy, so
+# changes made elsewhere show up after at most `ttl` seconds; changes made in this process
+# invalidate their entry immediately.
+identity_cache = LRUCache(maxsize=1024, ttl=60)
+
+
+def fetch_identity(user_id):
+    kind, _, key = user_id.partition(":")
+    if kind == "user" and key:
+        return db.session.get(UserDetails, key)
+    if kind == "admin" and key.isdigit():
+        return db.session.get(AdminDetails, int(key))
+    if not key:  # untyped id from a session created before ids were typed
+        user = db.session.get(UserDetails, user_id)
+        if user is None and user_id.isdigit():
+            return db.session.get(AdminDetails, int(user_id))
+        return user
+    return None
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    cached = identity_cache.get(user_id)
+    if cached is None:
+        cached = fetch_identity(user_id)
+        if cached is None:
+            return None
+        db.session.expunge(cached)
+        identity_cache.set(user_id, cached)
+    # per-request copy attached to this session, built from the cached state without a query
+    return db.session.merge(cached, load=False)
+
+
+@event.listens_for(UserDetails, "after_update")
+@event.listens_for(UserDetails, "after_delete")
+@event.listens_for(AdminDetails, "after_update")
+@event.listens_for(AdminDetails, "after_delete")
+def invalidate_changed_identity(mapper, connection, target):
+    identity_cache.invalidate(target.get_id())
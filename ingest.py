@@ -0,0 +1,283 @@
+from collections import Counter
+from threading import Condition, Thread
+import atexit
+import json
+import os
+import time
+from sqlalchemy.exc import DataError, IntegrityError
+from extensions import db
+from models import UserResponses
+from questions import ANSWER_SEPARATOR, OTHERS, QUESTION_FIELDS
+from tallies import increment_tallies, response_options
+from answers import store_answers
+from search import index_responses
+from processes import process_alive
+
+
+RESPONSE_COLUMNS = ["userid", "useremail", *QUESTION_FIELDS]
+ROW_ERRORS = (IntegrityError, DataError)  # the record itself is refused: retrying it cannot help
+CHECKBOX_FIELDS = ("question2", "question5", "question10")  # every ticked answerN value, ', '-joined
+OTHER_TEXT_FIELDS = ("question2", "question4", "question5", "question6", "question7", "question11")
+
+
+def form_values(form, name):
+    """All values of a form field: request.form, or a plain mapping whose values may be lists."""
+    if hasattr(form, "getlist"):
+        return form.getlist(name)
+    value = form.get(name)
+    if value is None or value == "":
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def form_record(form, userid, useremail):
+    """The response record for one survey form (answerN / other_qN fields), normalized as home() stores it.
+
+    Checkbox answers are joined with ', ' (empty when nothing is ticked) and an answer containing
+    "Others" gets its other_qN text appended.
+    """
+    record = {"userid": userid, "useremail": useremail}
+    for field in QUESTION_FIELDS:
+        number = field[len("question"):]
+        values = form_values(form, f"answer{number}")
+        answer = ANSWER_SEPARATOR.join(values) if field in CHECKBOX_FIELDS else next(iter(values), None)
+        other = form.get(f"other_q{number}")
+        if field in OTHER_TEXT_FIELDS and isinstance(answer, str) and OTHERS in answer and other:
+            answer += ANSWER_SEPARATOR + other
+        record[field] = answer
+    return record
+
+
+def validate_submission(record):
+    """Problems that would make the insert fail, checked up front so one bad row can't sink a batch."""
+    errors = []
+    for name in RESPONSE_COLUMNS:
+        column = UserResponses.__table__.columns[name]
+        value = record.get(name)
+        if value is None:
+            if not column.nullable:
+                errors.append(f"{name} is required")
+        elif not isinstance(value, str):
+            errors.append(f"{name} must be text")
+        elif column.type.length and len(value) > column.type.length:
+            errors.append(f"{name} is longer than {column.type.length} characters")
+    return errors
+
+
+def store_submissions(records):
+    """Insert response records (dicts of RESPONSE_COLUMNS), their answer rows, search postings and tallies
+    in the current transaction."""
+    table = UserResponses.__table__  # Core, so records with and without None answers share one executemany
+    inserted = db.session.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True), records)
+    response_ids = inserted.scalars().all()
+    store_answers(response_ids, records)
+    index_responses(response_ids, records)
+    counts = Counter()
+    for record in records:
+        counts.update(response_options(record))
+    increment_tallies(counts)
+
+
+class SubmissionBuffer:
+    """Write-behind queue for survey submissions.
+
+    Requests hand validated records to submit() and return immediately; a background thread
+    inserts them in multi-row batches once `batch_size` are pending or `flush_interval` seconds
+    have passed. At most `max_pending` records wait in memory: past that submit() blocks for up to
+    `put_timeout` seconds and then returns False so the caller writes synchronously instead.
+
+    With a `spool_dir`, every accepted record is appended to a per-process JSONL segment before
+    submit() returns and the segment is deleted once its batch commits; segments left by a crashed
+    process are replayed on the next start (delivery is at-least-once). Pending records are flushed
+    on interpreter exit and by close().
+
+    Only records the database rejects on their own (ROW_ERRORS) are dropped. Any other failure,
+    such as a lost connection, keeps the unwritten records and their segment and retries them with
+    exponential backoff up to `max_retry_interval` seconds; they count against `max_pending`, so a
+    long outage turns into synchronous writes (and their errors) instead of unbounded memory.
+    """
+
+    def __init__(self, app, batch_size=500, flush_interval=1.0, max_pending=10000, put_timeout=2.0,
+                 spool_dir=None, max_retry_interval=30.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.spool_dir = spool_dir
+        self.max_retry_interval = max_retry_interval
+        self.condition = Condition()
+        self.pending = []
+        self.unwritten = []  # [segment path or None, records] a database outage left behind, oldest first
+        self.unwritten_count = 0
+        self.retry_interval = 0.0  # > 0 while backing off
+        self.pid = None
+        self.closing = False
+        self.thread = None
+        self.segment = None
+        self.sequence = 0
+        self.flushed = 0
+
+    def submit(self, record):
+        self._ensure_started()
+        deadline = time.monotonic() + self.put_timeout
+        with self.condition:
+            while len(self.pending) + self.unwritten_count >= self.max_pending and not self.closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            if self.closing:
+                return False
+            if self.segment is not None:
+                self.segment.write(json.dumps(record) + "\n")
+                self.segment.flush()
+            self.pending.append(record)
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+        return True
+
+    def close(self):
+        """Stop accepting submissions and flush everything still pending."""
+        with self.condition:
+            if self.closing or self.thread is None:
+                self.closing = True
+                return
+            self.closing = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _ensure_started(self):
+        # started lazily so each forked worker gets its own thread (threads don't survive fork)
+        if self.pid == os.getpid():
+            return
+        with self.condition:
+            if self.pid == os.getpid():
+                return
+            self.pending, self.closing, self.sequence = [], False, 0
+            self.unwritten, self.unwritten_count, self.retry_interval = [], 0, 0.0
+            self.pid = os.getpid()
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._replay_orphaned_segments()
+                self._open_segment()
+            self.thread = Thread(target=self._run, name="submission-buffer", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def _segment_path(self, pid, sequence):
+        return os.path.join(self.spool_dir, f"{pid}-{sequence:06d}.jsonl")
+
+    def _open_segment(self):
+        self.sequence += 1
+        self.segment = open(self._segment_path(self.pid, self.sequence), "a", encoding="utf-8")
+
+    def _replay_orphaned_segments(self):
+        for name in sorted(os.listdir(self.spool_dir)):
+            pid = name.split("-", 1)[0]
+            if not name.endswith(".jsonl") or not pid.isdigit() or process_alive(int(pid)):
+                continue
+            claimed = os.path.join(self.spool_dir, f"{self.pid}-replay-{name}")
+            try:
+                os.rename(os.path.join(self.spool_dir, name), claimed)  # only one worker wins the rename
+            except OSError:
+                continue
+            with open(claimed, encoding="utf-8") as segment:
+                records = [json.loads(line) for line in segment if line.strip()]
+            self.unwritten.append([claimed, records])  # written by the thread before anything newer
+            self.unwritten_count += len(records)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + (self.retry_interval or self.flush_interval)
+                while (self.retry_interval or len(self.pending) < self.batch_size) and not self.closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                records, self.pending = self.pending, []
+                if records:
+                    finished_segment = None
+                    if self.segment is not None:
+                        self.segment.close()
+                        finished_segment = self.segment.name
+                        if not self.closing:
+                            self._open_segment()
+                    self.unwritten.append([finished_segment, records])
+                    self.unwritten_count += len(records)
+                unwritten = list(self.unwritten)
+                closing = self.closing
+
+            failed = False
+            for entry in unwritten:
+                segment, records = entry
+                left = self._write(records)
+                with self.condition:
+                    self.unwritten_count -= len(records) - len(left)
+                    if left:
+                        entry[1] = left
+                    else:
+                        self.unwritten.remove(entry)
+                    self.condition.notify_all()  # room for blocked submitters
+                if not left:
+                    if segment:
+                        os.remove(segment)
+                    continue
+                if segment and len(left) < len(records):
+                    self._rewrite_segment(segment, left)  # so a replay does not repeat what did commit
+                failed = True
+                break
+            self.retry_interval = min(max(self.retry_interval * 2, self.flush_interval), self.max_retry_interval) \
+                if failed else 0.0
+
+            if closing:
+                if self.segment is not None and not self.segment.closed:
+                    self.segment.close()
+                    if os.path.getsize(self.segment.name) == 0:
+                        os.remove(self.segment.name)
+                if self.unwritten_count:
+                    kept = "kept in the spool for the next start" if self.spool_dir else "lost"
+                    print(f"[DB ERROR] {self.unwritten_count} submissions could not be written before shutdown, {kept}")
+                return
+
+    def _rewrite_segment(self, path, records):
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as segment:
+            segment.writelines(json.dumps(record) + "\n" for record in records)
+        os.replace(temporary, path)
+
+    def _write(self, records):
+        """Store records batch by batch; returns the ones a database error not tied to a row left unwritten."""
+        with self.app.app_context():
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                try:
+                    store_submissions(batch)
+                    db.session.commit()
+                except ROW_ERRORS as e:
+                    db.session.rollback()
+                    print(f"[DB ERROR] batch of {len(batch)} submissions failed, retrying one by one: {e}")
+                    left = self._write_individually(batch)
+                    if left:
+                        return left + records[start + len(batch):]
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[DB ERROR] {len(records) - start} submissions kept for a retry: {e}")
+                    return records[start:]
+                self.flushed += len(batch)
+        return []
+
+    def _write_individually(self, records):
+        for position, record in enumerate(records):
+            try:
+                store_submissions([record])
+                db.session.commit()
+            except ROW_ERRORS as e:
+                db.session.rollback()
+                print(f"[DB ERROR] dropped submission from {record.get('userid')}: {e}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[DB ERROR] {len(records) - position} submissions kept for a retry: {e}")
+                return records[position:]
+        return []
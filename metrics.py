@@ -0,0 +1,233 @@
+from contextlib import contextmanager
+from threading import Lock, Thread
+from time import perf_counter, sleep
+import atexit
+import bisect
+import fcntl
+import json
+import os
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from processes import process_alive
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with labels; each worker process keeps its own (see SharedMetrics)."""
+
+    def __init__(self, name, description, labels, buckets):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = Lock()
+
+    def observe(self, label_values, value):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {key: list(values) for key, values in self.series.items()}
+
+    def exposition(self, series, worker=None):
+        """Text exposition of `series` ({label values: counts and sum}), labelled with `worker` if given."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values))
+            if worker is not None:
+                labels += f',worker="{worker}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-1]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram("petsurvey_request_duration_seconds", "Request latency by endpoint.",
+                            ("endpoint", "method"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram("petsurvey_request_db_queries", "SQL statements executed per request.",
+                            ("endpoint",), QUERY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("petsurvey_request_db_seconds", "Time spent in SQL statements per request.",
+                               ("endpoint",), LATENCY_BUCKETS)
+SPAN_SECONDS = Histogram("petsurvey_span_seconds", "Duration of named stages inside requests.",
+                         ("span",), LATENCY_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, SPAN_SECONDS)
+ARCHIVE_FILE = "archive.json"
+
+
+class SharedMetrics:
+    """The histograms of every worker process on the host, summed through files in `directory`.
+
+    Without it each worker serves only its own series, and a scrape reaches whichever worker the
+    server picks. With it a background thread in each worker writes that worker's series to
+    <pid>.json every `interval` seconds while they change (and at exit), and /metrics in any worker
+    sums every file. Files of exited workers are folded into archive.json under a lock, so recycled
+    workers neither lose their counts nor pile up files. The directory must be emptied when the
+    server starts, as gunicorn.conf.py does for METRICS_DIR.
+    """
+
+    def __init__(self, directory, interval=5.0):
+        self.directory = directory
+        self.interval = interval
+        self.lock = Lock()
+        self.pid = None
+        self.dirty = False
+
+    def touch(self):
+        """Note new observations, starting this process's writer on first use (threads don't survive fork)."""
+        self.dirty = True
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            os.makedirs(self.directory, exist_ok=True)
+            Thread(target=self._run, name="metrics-writer", daemon=True).start()
+            atexit.register(self.write)
+
+    def _run(self):
+        while True:
+            sleep(self.interval)
+            if self.dirty:
+                self.write()
+
+    def write(self):
+        self.dirty = False
+        self._dump(os.path.join(self.directory, f"{os.getpid()}.json"),
+                   {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS})
+
+    def collect(self):
+        """{histogram name: {label values: counts and sum}} summed over every worker, this one up to date."""
+        self.write()
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                names = os.listdir(self.directory)
+                exited = [name for name in names
+                          if name.endswith(".json") and name[:-5].isdigit() and not process_alive(int(name[:-5]))]
+                if exited:
+                    self._dump(os.path.join(self.directory, ARCHIVE_FILE),
+                               self._sum([ARCHIVE_FILE, *exited] if ARCHIVE_FILE in names else exited))
+                    for name in exited:
+                        os.remove(os.path.join(self.directory, name))
+                return self._sum([name for name in os.listdir(self.directory) if name.endswith(".json")])
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _sum(self, names):
+        totals = {histogram.name: {} for histogram in HISTOGRAMS}
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                    stored = json.load(file)
+            except FileNotFoundError:
+                continue
+            for histogram_name, entries in stored.items():
+                series = totals.setdefault(histogram_name, {})
+                for label_values, values in entries:
+                    key = tuple(label_values)
+                    current = series.get(key)
+                    series[key] = values if current is None else [a + b for a, b in zip(current, values)]
+        return totals
+
+    @staticmethod
+    def _dump(path, totals):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({name: [[list(key), values] for key, values in series.items()]
+                       for name, series in totals.items()}, file)
+        os.replace(temporary, path)
+
+
+@contextmanager
+def span(name):
+    """Time a stage of the current request; free when instrumentation is off or outside a request."""
+    spans = g.get('metrics_spans') if has_request_context() else None
+    if spans is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info['metrics_query_start'].pop()
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_queries += 1
+        g.metrics_db_seconds += elapsed
+
+
+def _start_request():
+    g.metrics_start = perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_seconds = 0.0
+    g.metrics_spans = {}
+
+
+def _finish_request(response):
+    if 'metrics_start' not in g:
+        return response
+    elapsed = perf_counter() - g.metrics_start
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_SECONDS.observe((endpoint, request.method), elapsed)
+    REQUEST_QUERIES.observe((endpoint,), g.metrics_queries)
+    REQUEST_DB_SECONDS.observe((endpoint,), g.metrics_db_seconds)
+    timings = [f'db;dur={g.metrics_db_seconds * 1000:.1f};desc="{g.metrics_queries} queries"']
+    for name, seconds in g.metrics_spans.items():
+        SPAN_SECONDS.observe((name,), seconds)
+        timings.append(f"{name};dur={seconds * 1000:.1f}")
+    timings.append(f"total;dur={elapsed * 1000:.1f}")
+    response.headers.add('Server-Timing', ", ".join(timings))
+    shared = current_app.extensions.get('shared_metrics')
+    if shared is not None:
+        shared.touch()
+    return response
+
+
+def metrics_view():
+    """Prometheus text exposition: every worker's histograms summed with METRICS_DIR, else this worker's
+    (label `worker` tells workers apart)."""
+    shared = current_app.extensions.get('shared_metrics')
+    if shared is not None:
+        totals = shared.collect()
+        lines = [line for histogram in HISTOGRAMS for line in histogram.exposition(totals.get(histogram.name, {}))]
+    else:
+        worker = os.getpid()
+        lines = [line for histogram in HISTOGRAMS for line in histogram.exposition(histogram.snapshot(), worker)]
+    return "\n".join(lines) + "\n", 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def init_metrics(app):
+    """Time every request, count its SQL and serve /metrics; only called when METRICS is on."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    if app.config.get('METRICS_DIR'):
+        app.extensions['shared_metrics'] = SharedMetrics(app.config['METRICS_DIR'])
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,100 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, ForeignKey
+from flask_login import UserMixin
+from extensions import db
+
+
+class UserDetails(UserMixin, db.Model): # user table schema
+    userid:   Mapped[str] = mapped_column(String(30), primary_key=True)
+    username: Mapped[str] = mapped_column(String(50))
+    password: Mapped[str] = mapped_column(String(255))  # room for scrypt and long salts
+    email:    Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    phone:    Mapped[str] = mapped_column(String(15), unique=True, nullable=False)
+
+    def get_id(self): # typed so the user_loader only ever queries one table
+        return f"user:{self.userid}"
+
+class UserResponses(db.Model):  # user_response table schema
+    __table_args__ = (  # keyset pagination of the admin response table, filtered by user
+        db.Index('ix_user_responses_userid_id', 'userid', 'id'),
+        db.Index('ix_user_responses_useremail_id', 'useremail', 'id'),
+    )
+
+    id:        Mapped[int] = mapped_column(Integer, primary_key=True)
+    userid:    Mapped[str] = mapped_column(String(50), ForeignKey("user_details.userid"), nullable=False)
+    useremail: Mapped[str] = mapped_column(String(50))
+    question1: Mapped[str] = mapped_column(String(50))
+    question2: Mapped[str] = mapped_column(String(500))
+    question3: Mapped[str] = mapped_column(String(50))
+    question4: Mapped[str] = mapped_column(String(50))
+    question5: Mapped[str] = mapped_column(String(500))
+    question6: Mapped[str] = mapped_column(String(500))
+    question7: Mapped[str] = mapped_column(String(500))
+    question8: Mapped[str] = mapped_column(String(500))
+    question9: Mapped[str] = mapped_column(String(500))
+    question10: Mapped[str] = mapped_column(String(500))
+    question11: Mapped[str] = mapped_column(String(500))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "userid": self.userid,
+            "useremail": self.useremail,
+            "question1": self.question1,
+            "question2": self.question2,
+            "question3": self.question3,
+            "question4": self.question4,
+            "question5": self.question5,
+            "question6": self.question6,
+            "question7": self.question7,
+            "question8": self.question8,
+            "question9": self.question9,
+            "question10": self.question10,
+            "question11": self.question11,
+        }
+
+
+class ResponseAnswer(db.Model):  # one row per chosen option, so answers can be counted with GROUP BY
+    __tablename__ = 'response_answers'
+    __table_args__ = (
+        db.Index('ix_response_answers_question_option', 'question', 'option', 'response_id'),
+        db.Index('ix_response_answers_response_question', 'response_id', 'question'),
+    )
+
+    id:          Mapped[int] = mapped_column(Integer, primary_key=True)
+    response_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_responses.id"), nullable=False)
+    question:    Mapped[str] = mapped_column(String(20), nullable=False)
+    option:      Mapped[str] = mapped_column(String(500), nullable=False)
+    other_text:  Mapped[str] = mapped_column(String(500), nullable=True)  # free text given with "Others"
+
+
+class SearchPosting(db.Model):  # one row per word of free text: the inverted index behind the admin search
+    __tablename__ = 'search_postings'
+    __table_args__ = (
+        db.Index('ix_search_postings_response', 'response_id'),
+    )
+
+    term:        Mapped[str] = mapped_column(String(64), primary_key=True)  # normalized token, (term, ...) is the lookup
+    response_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_responses.id"), primary_key=True)
+    question:    Mapped[str] = mapped_column(String(20), primary_key=True)
+    position:    Mapped[int] = mapped_column(Integer, primary_key=True)  # token offset in the answer, for phrases
+
+
+class ResponseTally(db.Model):  # running (question, option) -> count, kept in step with user_responses
+    question: Mapped[str] = mapped_column(String(20), primary_key=True)
+    option:   Mapped[str] = mapped_column(String(500), primary_key=True)
+    count:    Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class IdCounter(db.Model):  # last allocated number per generated id, bumped atomically
+    name:  Mapped[str] = mapped_column(String(30), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class AdminDetails(UserMixin, db.Model):
+    id       : Mapped[int] = mapped_column(Integer, primary_key=True)
+    email    : Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    password : Mapped[str] = mapped_column(String(255), nullable=False)  # a werkzeug hash, plaintext until rehashed
+
+    def get_id(self):
+        return f"admin:{self.id}"
@@ -0,0 +1,12 @@
+import os
+
+
+def process_alive(pid):
+    """True while a process with this pid exists on the host (including ones owned by other users)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
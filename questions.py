@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+OTHERS = "Others"
+ANSWER_SEPARATOR = ", "
+
+
+@dataclass(frozen=True)
+class QuestionSpec:  # how one survey question is stored, counted and charted
+    field: str
+    title: str
+    chart: str                   # "pie", "hbar" (horizontal bar) or "bar"
+    choices: tuple = ()          # options offered in templates/home.html, empty for free text
+    multi: bool = False          # several ', '-joined options (multi select, or free text split like one)
+    lowercase: bool = False      # count free text case-insensitively
+    hide_others: bool = False    # drop the bare "Others" marker from the chart
+    percent_labels: bool = False
+    axis_titles: tuple = ()      # (x, y) for bar charts
+    size: tuple = ()             # (width, height), plotly default when empty
+
+    def parse(self, answer):
+        """Split a stored answer into (selected options, "Others" free text or None).
+
+        home() joins the ticked choices in form order, where "Others" comes last, and appends the
+        free text after it, so choices are matched whole (some contain ', ') up to "Others" and
+        everything after that is the free text, commas included. Text that matches no choice is
+        kept as options the way the comma-split dashboard always counted it.
+        """
+        selected, other_text = _parse_answer(self, answer)
+        return list(selected), other_text
+
+    def options(self, answer):
+        """Normalized options a single stored answer counts towards."""
+        selected, other_text = self.parse(answer)
+        options = selected + [other_text] if other_text else selected
+        if self.lowercase:
+            options = [option.lower() for option in options]
+        return options
+
+
+@lru_cache(maxsize=8192)  # answers repeat a lot, and every stored response is parsed for answers, tallies and search
+def _parse_answer(spec, answer):
+    if not spec.choices:
+        return tuple(answer.split(ANSWER_SEPARATOR) if spec.multi else [answer]), None
+
+    choices = sorted(spec.choices, key=len, reverse=True)  # longest first: some choices contain ', '
+    selected, rest = [], answer
+    while rest and OTHERS not in selected:
+        choice = next((choice for choice in choices
+                       if rest == choice or rest.startswith(choice + ANSWER_SEPARATOR)), None)
+        if choice is None:
+            break
+        selected.append(choice)
+        rest = rest[len(choice) + len(ANSWER_SEPARATOR):]
+
+    if not rest:
+        return tuple(selected), None
+    if OTHERS in selected:
+        return tuple(selected), rest
+    return tuple(selected + rest.split(ANSWER_SEPARATOR)), None
+
+
+QUESTIONS = (
+    QuestionSpec("question1", "How long have you owned pets?", "pie",
+                 choices=("less than 1 year", "1-3 years", "3-5 years", "5+ years")),
+    QuestionSpec("question2", "What types of pets do you currently own?", "hbar",
+                 choices=("Dog", "Cat", "Bird", "Fish", "Reptile", OTHERS),
+                 multi=True, hide_others=True, percent_labels=True,
+                 axis_titles=("Count", "Pet Type"), size=(1300, 600)),
+    QuestionSpec("question3", "How often do you use social media to engage with other pet owners?", "pie",
+                 choices=("Daily", "Weekly", "Monthly", "Rarely", "Never")),
+    QuestionSpec("question4", "Do you follow any pet-related accounts on social media?"
+                              "(If yes, please specify which platform you use most often)", "pie",
+                 choices=("Yes", "No", OTHERS), multi=True, hide_others=True),
+    QuestionSpec("question5", "What challenges do you face when looking for pet care information online?"
+                              "(Select all that apply)", "hbar",
+                 choices=("Too much conflicting information", "Difficulty finding trustworthy advice",
+                          "Lack of pet-specific resources", "Overwhelming amount of content", OTHERS),
+                 multi=True, hide_others=True, percent_labels=True,
+                 axis_titles=("Count", "Challenge Type"), size=(1300, 600)),
+    QuestionSpec("question6", "How do you currently find local services for your pets"
+                              "(e.g., vet clinics, groomers, pet-friendly cafes)?", "pie",
+                 choices=("Online search (Google)", "Social media platforms", "Word of mouth", OTHERS),
+                 multi=True, hide_others=True),
+    QuestionSpec("question7", "How do you currently find other pet owners for socializing or playdates?", "pie",
+                 choices=("Social media groups", "Pet-related apps/websites", "In-person meetups/events", OTHERS),
+                 multi=True, hide_others=True),
+    QuestionSpec("question8", "Have you ever experienced difficulty in adopting a pet or finding trustworthy "
+                              "adoption listings? What was the biggest barrier?", "bar",
+                 multi=True, lowercase=True, percent_labels=True,
+                 axis_titles=("Responses", "Count"), size=(1300, 600)),
+    QuestionSpec("question9", "Would you prefer a platform that centralizes all pet-related services and "
+                              "community engagement? Why or why not?", "bar",
+                 multi=True, lowercase=True, percent_labels=True,
+                 axis_titles=("Responses", "Count"), size=(1300, 600)),
+    QuestionSpec("question10", "What features would you want most in a platform dedicated to pets? (Select top 3)",
+                 "hbar",
+                 choices=("Personalized pet profiles", "Local pet services directory (vet, groomers, etc.)",
+                          "Pet playdate matchmaking", "Pet adoption listings", "Emotional support for pet loss",
+                          "Community forums for pet care advice", "Marketplace for pet products",
+                          "Pet challenges & contests"),
+                 multi=True, hide_others=True, percent_labels=True, axis_titles=("Count", "Response")),
+    QuestionSpec("question11", "Would you be willing to pay for premium features on a pet social platform?", "pie",
+                 choices=("Yes", "No", "Maybe, depending on featuresIf yes, what premium features would you find valuable?",
+                          OTHERS),
+                 multi=True, hide_others=True),
+)
+
+QUESTION_FIELDS = [spec.field for spec in QUESTIONS]
+QUESTIONS_BY_FIELD = {spec.field: spec for spec in QUESTIONS}
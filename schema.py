@@ -0,0 +1,56 @@
+"""Bring a database created by an earlier release up to the current models.
+
+`flask init-db` runs db.create_all(), which creates missing tables but never touches existing ones;
+the helpers here make the changes it leaves out. Each is idempotent.
+"""
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import String, inspect
+from extensions import db
+
+
+def columns_to_widen(inspector):
+    """(table, model column, existing column info) for VARCHAR columns the models have made longer."""
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            current = existing.get(column.name)
+            if (current is not None and isinstance(column.type, String) and isinstance(current["type"], String)
+                    and column.type.length and current["type"].length
+                    and current["type"].length < column.type.length):
+                yield table, column, current
+
+
+def widen_columns():
+    """ALTER VARCHAR columns up to their model length (e.g. password for longer hashes); returns "table.column"s.
+
+    SQLite does not enforce VARCHAR lengths and cannot alter a column type, so it is left alone.
+    """
+    if db.engine.dialect.name == "sqlite":
+        return []
+    widened = []
+    with db.engine.begin() as connection:
+        operations = Operations(MigrationContext.configure(connection))
+        for table, column, current in list(columns_to_widen(inspect(connection))):
+            operations.alter_column(table.name, column.name, type_=column.type, existing_type=current["type"],
+                                    existing_nullable=current["nullable"])
+            widened.append(f"{table.name}.{column.name}")
+    return widened
+
+
+def create_missing_indexes():
+    """CREATE the model indexes an existing table lacks (e.g. user_responses' keyset indexes); returns their names."""
+    created = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(connection, checkfirst=True)
+                    created.append(index.name)
+    return created
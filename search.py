@@ -0,0 +1,224 @@
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.orm import aliased
+import re
+import unicodedata
+from extensions import db
+from cache import LRUCache
+from models import SearchPosting, UserResponses
+from questions import QUESTIONS, QUESTION_FIELDS, QUESTIONS_BY_FIELD
+from snapshots import change_token
+from metrics import span
+
+
+MAX_TERM_LENGTH = 64  # SearchPosting.term
+MAX_CLAUSES = 8
+MAX_PHRASE_TERMS = 8
+PREFIX_EXPANSIONS = 20  # most frequent terms reported per prefix
+INDEX_BATCH_SIZE = 2000
+WORD = re.compile(r"[^\W_]+")
+QUERY_PART = re.compile(r'"([^"]*)"?|(\S+)')
+
+result_cache = LRUCache(32, 3600)  # (total, term counts) per (token, query)
+
+
+class SearchError(Exception):
+    """A search query without words, with too many of them or naming an unknown question."""
+
+
+def normalize(text):
+    """Case-folded with accents stripped, so "Café" and "cafe" index the same."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [word[:MAX_TERM_LENGTH] for word in WORD.findall(normalize(text))]
+
+
+def searchable_text(spec, answer):
+    """The free text in a stored answer: all of a text question's answer, else the "Others" text."""
+    if not spec.choices:
+        return answer
+    return spec.parse(answer)[1]
+
+
+def posting_rows(response_id, record):
+    """search_postings rows for one stored response ({field: stored answer})."""
+    rows = []
+    for spec in QUESTIONS:
+        answer = record.get(spec.field)
+        text = searchable_text(spec, answer) if answer else None
+        if text:
+            rows.extend({"term": term, "response_id": response_id, "question": spec.field, "position": position}
+                        for position, term in enumerate(tokenize(text)))
+    return rows
+
+
+def index_responses(response_ids, records):
+    """Add the postings of stored responses in the current transaction."""
+    rows = [row for response_id, record in zip(response_ids, records) for row in posting_rows(response_id, record)]
+    if rows:
+        db.session.execute(SearchPosting.__table__.insert(), rows)
+
+
+def rebuild_search_index():
+    """Re-index every stored response in id batches, committing as it goes; returns responses read.
+
+    Each batch replaces its responses' postings, so submissions indexed while this runs are not
+    indexed twice.
+    """
+    db.session.execute(db.delete(SearchPosting))
+    db.session.commit()
+    last_id = db.session.execute(db.select(func.max(UserResponses.id))).scalar() or 0
+    columns = [UserResponses.id, *[getattr(UserResponses, field) for field in QUESTION_FIELDS]]
+    first_id, done = 0, 0
+    while True:
+        batch = db.session.execute(
+            db.select(*columns).where(UserResponses.id > first_id, UserResponses.id <= last_id)
+            .order_by(UserResponses.id).limit(INDEX_BATCH_SIZE)
+        ).all()
+        if not batch:
+            return done
+        ids = [row.id for row in batch]
+        db.session.execute(db.delete(SearchPosting).where(SearchPosting.response_id.in_(ids)))
+        index_responses(ids, [row._mapping for row in batch])
+        db.session.commit()
+        first_id = ids[-1]
+        done += len(batch)
+
+
+def parse_query(query):
+    """Clauses of a query, each a list of (term, is prefix) at consecutive positions.
+
+    Words are terms, `word*` is a prefix and "quoted words" a phrase, whose last word may end in *.
+    An answer matches when it matches every clause.
+    """
+    clauses = []
+    for phrase, word in QUERY_PART.findall(query or ""):
+        text = phrase or word
+        terms = tokenize(text)
+        if not terms:
+            continue
+        if len(terms) > MAX_PHRASE_TERMS:
+            raise SearchError(f"Phrases are limited to {MAX_PHRASE_TERMS} words")
+        prefix = text.rstrip().endswith("*")
+        clauses.append([(term, prefix and position == len(terms) - 1) for position, term in enumerate(terms)])
+    if not clauses:
+        raise SearchError("q needs at least one word")
+    if len(clauses) > MAX_CLAUSES:
+        raise SearchError(f"Queries are limited to {MAX_CLAUSES} words or phrases")
+    return clauses
+
+
+def term_condition(column, term, prefix):
+    if not prefix:
+        return column == term
+    return and_(column >= term, column < term[:-1] + chr(ord(term[-1]) + 1))  # an index range, unlike LIKE
+
+
+def clause_conditions(clause, posting):
+    """Conditions on `posting` for the clause's first term followed by its other terms at consecutive positions."""
+    conditions = [term_condition(posting.term, *clause[0])]
+    for offset, (term, prefix) in enumerate(clause[1:], 1):
+        following = aliased(SearchPosting)
+        conditions.append(db.select(following.position).where(
+            term_condition(following.term, term, prefix), following.response_id == posting.response_id,
+            following.question == posting.question, following.position == posting.position + offset).exists())
+    return conditions
+
+
+def matching_answers(clauses, question=None, driver=0):
+    """(response_id, question) of the answers matching every clause, one row each.
+
+    Postings of clause `driver` are read in primary key order, so a (term, response_id) prefix
+    yields the answers newest first without a sort; the other clauses are looked up per answer.
+    """
+    first = aliased(SearchPosting)
+    query = db.select(first.response_id, first.question).where(*clause_conditions(clauses[driver], first))
+    for number, clause in enumerate(clauses):
+        if number != driver:
+            other = aliased(SearchPosting)
+            query = query.where(db.select(other.position).where(
+                other.response_id == first.response_id, other.question == first.question,
+                *clause_conditions(clause, other)).exists())
+    if question is not None:
+        query = query.where(first.question == question)
+    return query.group_by(first.response_id, first.question)
+
+
+def term_frequencies(clauses, question=None):
+    """Occurrences and responses per query term; prefixes report their most frequent expansions."""
+    def grouped(condition):
+        query = (db.select(SearchPosting.term, func.count().label('occurrences'),
+                           func.count(SearchPosting.response_id.distinct()).label('responses'))
+                 .where(condition).group_by(SearchPosting.term))
+        return query.where(SearchPosting.question == question) if question is not None else query
+
+    exact = sorted({term for clause in clauses for term, prefix in clause if not prefix})
+    prefixes = sorted({term for clause in clauses for term, prefix in clause if prefix})
+    counts = {term: (0, 0) for term in exact}
+    if exact:
+        counts.update((row.term, (row.occurrences, row.responses))
+                      for row in db.session.execute(grouped(SearchPosting.term.in_(exact))))
+    terms = [{"term": term, "occurrences": occurrences, "responses": responses}
+             for term, (occurrences, responses) in counts.items()]
+    for prefix in prefixes:
+        expansions = grouped(term_condition(SearchPosting.term, prefix, True))
+        expansions = expansions.order_by(func.count().desc(), SearchPosting.term).limit(PREFIX_EXPANSIONS)
+        terms.extend({"term": row.term, "prefix": prefix, "occurrences": row.occurrences, "responses": row.responses}
+                     for row in db.session.execute(expansions))
+    return terms
+
+
+def match_counts(clauses, question=None):
+    """The number of matching answers and the term counts of term_frequencies()."""
+    matched = matching_answers(clauses, question).subquery()
+    total = db.session.execute(db.select(func.count()).select_from(matched)).scalar()
+    return total, term_frequencies(clauses, question)
+
+
+def driving_clause(clauses, terms):
+    """The clause to read postings in order from: one starting with the exact term in the fewest responses."""
+    responses = {term["term"]: term["responses"] for term in terms if "prefix" not in term}
+    return min(range(len(clauses)), key=lambda number: (clauses[number][0][1], responses.get(clauses[number][0][0], 0)))
+
+
+def search(query, question=None, limit=20, after=None):
+    """Free-text answers matching `query`, newest first, `limit` per page after the `after` key.
+
+    Returns {"total", "hits", "terms", "next", "token"}; "next" is the (response_id, question) key
+    to pass as `after` for the following page, None on the last one. Each page is read straight
+    from the index with a LIMIT; only the total and term counts, which need every match, are
+    cached per change token.
+    """
+    if question is not None and question not in QUESTIONS_BY_FIELD:
+        raise SearchError(f"Unknown question {question!r}, expected one of {', '.join(QUESTION_FIELDS)}")
+    clauses = parse_query(query)
+
+    token = change_token()
+    key = repr((token, clauses, question))
+    counts = result_cache.get(key)
+    if counts is None:
+        with span("search.counts"):
+            counts = match_counts(clauses, question)
+        result_cache.set(key, counts)
+    total, terms = counts
+
+    with span("search.match"):
+        matched = matching_answers(clauses, question, driving_clause(clauses, terms))
+        keys = matched.selected_columns
+        if after is not None:
+            matched = matched.where(tuple_(*keys) < tuple_(*after))
+        page = db.session.execute(matched.order_by(*[key.desc() for key in keys]).limit(limit + 1)).all()
+    more, page = len(page) > limit, page[:limit]
+    with span("search.fetch"):
+        responses = db.session.execute(
+            db.select(UserResponses).where(UserResponses.id.in_({response_id for response_id, _ in page}))
+        ).scalars().all()
+        by_id = {response.id: response for response in responses}
+        hits = [{"response_id": response_id, "userid": by_id[response_id].userid, "question": field,
+                 "text": searchable_text(QUESTIONS_BY_FIELD[field], getattr(by_id[response_id], field))}
+                for response_id, field in page]
+
+    return {"total": total, "hits": hits, "terms": terms, "token": token,
+            "next": list(page[-1]) if more else None}
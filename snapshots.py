@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+import time
+from sqlalchemy import func
+from extensions import db
+from models import UserResponses
+from cache import LRUCache
+from questions import QUESTIONS
+from tallies import load_tallies, tally_counts
+from metrics import span
+
+
+LATEST_KEY = "latest"  # token of the last complete set published by the precompute worker
+
+
+def change_token():
+    """Cheap fingerprint of user_responses: changes whenever a response is added or deleted."""
+    max_id, rows = db.session.execute(db.select(func.max(UserResponses.id), func.count())).one()
+    return f"{max_id or 0}-{rows}"
+
+
+def figure_key(field, token):
+    return f"figure:{field}:{token}"
+
+
+def render_figure(spec, total, counts):
+    from analytics import build_figure
+
+    return build_figure(spec, total, counts).to_json().encode()
+
+
+def figure_snapshot(cache, spec, token):
+    """Plotly figure JSON for one question as of `token`, rendered on a miss and cached when `cache` is set."""
+    key = figure_key(spec.field, token)
+    with span("dashboard.cache"):
+        snapshot = cache.get(key) if cache is not None else None
+    if snapshot is None:
+        # tallies are read after the token, so a snapshot is never older than its key
+        with span("dashboard.load"):
+            tallies = load_tallies(spec.field)
+        with span("dashboard.aggregate"):
+            total, counts = tally_counts(tallies, spec.field)
+        with span("dashboard.render"):
+            snapshot = render_figure(spec, total, counts)
+        if cache is not None:
+            cache.set(key, snapshot)
+    return snapshot
+
+
+def published_token(cache):
+    token = cache.get(LATEST_KEY) if cache is not None else None
+    return token.decode() if token else None
+
+
+class FileSnapshotCache:
+    """Snapshots stored as files in `directory`, shared by every worker process on the host.
+
+    Files are written to a temporary name and renamed into place, so readers never see a partial
+    snapshot. Entries older than `ttl` seconds are misses; past `maxsize` files the least recently
+    written ones are removed.
+    """
+
+    def __init__(self, directory, maxsize=256, ttl=3600):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest()[:32] + ".snapshot")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as snapshot:
+                if os.fstat(snapshot.fileno()).st_mtime + self.ttl < time.time():
+                    return None
+                return snapshot.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as snapshot:
+            snapshot.write(value)
+        os.replace(temporary, self._path(key))
+        self._evict()
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".snapshot"):
+                self._remove(os.path.join(self.directory, name))
+
+    def _evict(self):
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".snapshot"):
+                try:
+                    snapshots.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except FileNotFoundError:  # evicted by another worker meanwhile
+                    pass
+        expired = time.time() - self.ttl
+        snapshots.sort()
+        for position, (mtime, name) in enumerate(snapshots):
+            if mtime < expired or position < len(snapshots) - self.maxsize:
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def make_snapshot_cache(backend, directory=None, maxsize=64, ttl=3600):
+    """The cache configured by DASHBOARD_CACHE ("memory", "file" or "none")."""
+    if backend == "none":
+        return None
+    if backend == "file":
+        return FileSnapshotCache(directory or os.path.join(tempfile.gettempdir(), "petsurvey-snapshots"),
+                                 maxsize=maxsize, ttl=ttl)
+    if backend == "memory":
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Unknown DASHBOARD_CACHE backend {backend!r}")
+
+
+class SnapshotPublisher:
+    """Renders the dashboard off the request path and publishes it to a shared snapshot cache.
+
+    publish() does nothing while the change token stands still (apart from rewriting the set every
+    ttl/2 seconds so it never expires); otherwise it reads all tallies in one query, re-renders only
+    the questions whose counts moved, writes every figure under the new token and only then points
+    LATEST_KEY at it, so readers see either the whole new set or the previous one.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.rendered = {}  # field -> (total, counts, figure JSON) as last published
+        self.token = None
+        self.published_at = 0.0
+
+    def publish(self):
+        token = change_token()
+        if token == self.token and time.monotonic() - self.published_at < self.cache.ttl / 2:
+            return False
+        tallies = load_tallies()
+        for spec in QUESTIONS:
+            total, counts = tally_counts(tallies, spec.field)
+            previous = self.rendered.get(spec.field)
+            if previous is None or previous[:2] != (total, counts):
+                self.rendered[spec.field] = (total, counts, render_figure(spec, total, counts))
+            self.cache.set(figure_key(spec.field, token), self.rendered[spec.field][2])
+        self.cache.set(LATEST_KEY, token.encode())
+        self.token, self.published_at = token, time.monotonic()
+        return True
@@ -0,0 +1,37 @@
+// admin dashboard charts: fetch each figure's JSON when it scrolls into view
+document.addEventListener("DOMContentLoaded", function () {
+    const containers = document.querySelectorAll(".dashboard-figure");
+
+    function loadFigure(container) {
+        fetch(container.dataset.src, { credentials: "same-origin" })
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then((figure) => {
+                container.innerHTML = "";
+                Plotly.newPlot(container, figure.data, figure.layout, { responsive: true });
+            })
+            .catch(() => {
+                container.textContent = "Failed to load chart.";
+            });
+    }
+
+    if (!("IntersectionObserver" in window)) {
+        containers.forEach(loadFigure);
+        return;
+    }
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                loadFigure(entry.target);
+            }
+        });
+    }, { rootMargin: "200px" });
+
+    containers.forEach((container) => observer.observe(container));
+});
@@ -0,0 +1,104 @@
+// admin response table: pages through /admin/responses instead of rendering every row
+document.addEventListener("DOMContentLoaded", function () {
+    const table = document.getElementById("responseTable");
+    const container = document.getElementById("responseTableContainer");
+    const tbody = table.querySelector("tbody");
+    const searchInput = document.getElementById("searchInput");
+    const userFilter = document.getElementById("userFilter");
+    const loadMore = document.getElementById("loadMore");
+    const columns = ["id", "userid", "useremail"];
+    for (let n = 1; n <= 11; n++) {
+        columns.push(`question${n}`);
+    }
+
+    let sort = "id";
+    let next = null;
+    let loading = false;
+    let done = false;
+    let generation = 0;
+
+    function applySearch(rows) {
+        const filter = searchInput.value.toLowerCase();
+        rows.forEach((row) => {
+            row.classList.toggle("no-match", !row.textContent.toLowerCase().includes(filter));
+        });
+    }
+
+    function pageUrl() {
+        const params = new URLSearchParams({ sort: sort });
+        const user = userFilter.value.trim();
+        if (user) {
+            params.set(user.includes("@") ? "useremail" : "userid", user);
+        }
+        if (next) {
+            params.set("after", next);
+        }
+        return `${table.dataset.src}?${params}`;
+    }
+
+    function loadPage() {
+        if (loading || done) {
+            return;
+        }
+        loading = true;
+        const requested = generation;
+        fetch(pageUrl(), { credentials: "same-origin" })
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then((page) => {
+                if (requested !== generation) {
+                    return;
+                }
+                const rows = page.responses.map((response) => {
+                    const row = document.createElement("tr");
+                    columns.forEach((column) => {
+                        const cell = document.createElement("td");
+                        cell.textContent = response[column] ?? "";
+                        row.appendChild(cell);
+                    });
+                    return row;
+                });
+                rows.forEach((row) => tbody.appendChild(row));
+                applySearch(rows);
+                next = page.next;
+                done = next === null;
+                loadMore.hidden = done;
+            })
+            .finally(() => {
+                loading = false;
+            });
+    }
+
+    function reload() {
+        generation += 1;
+        next = null;
+        done = false;
+        loading = false;
+        tbody.innerHTML = "";
+        loadPage();
+    }
+
+    searchInput.addEventListener("keyup", () => applySearch(tbody.querySelectorAll("tr")));
+    userFilter.addEventListener("change", reload);
+    loadMore.addEventListener("click", loadPage);
+
+    container.addEventListener("scroll", () => {
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 100) {
+            loadPage();
+        }
+    });
+
+    table.querySelectorAll("th[data-sort]").forEach((header) => {
+        header.addEventListener("click", () => {
+            const column = header.dataset.sort;
+            sort = sort === column ? `-${column}` : column;
+            reload();
+        });
+    });
+
+    loadPage();
+});
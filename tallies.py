@@ -0,0 +1,101 @@
+from collections import Counter, defaultdict
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import ResponseTally
+from questions import QUESTIONS
+from answers import option_counts_query, response_totals_query
+
+
+TALLY_TOTAL = "__total__"  # per-question row holding the number of responses
+TALLY_BATCH_SIZE = 1000
+
+
+def response_options(answers):
+    """Count the (question, option) pairs one response ({field: stored answer}) adds to the tallies."""
+    counts = Counter()
+    for spec in QUESTIONS:
+        answer = answers.get(spec.field)
+        if answer is None:
+            continue
+        counts[(spec.field, TALLY_TOTAL)] += 1
+        counts.update((spec.field, option) for option in spec.options(answer))
+    return counts
+
+
+def increment_tallies(counts):
+    """Add counts to response_tally inside the current transaction (atomic upsert where supported)."""
+    rows = [{"question": question, "option": option, "count": count}
+            for (question, option), count in counts.items()]
+    dialect = db.session.get_bind().dialect.name
+
+    for start in range(0, len(rows), TALLY_BATCH_SIZE):
+        batch = rows[start:start + TALLY_BATCH_SIZE]
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(ResponseTally).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ResponseTally.question, ResponseTally.option],
+                set_={"count": ResponseTally.count + stmt.excluded["count"]},
+            )
+            db.session.execute(stmt)
+            continue
+
+        for row in batch:
+            result = db.session.execute(
+                db.update(ResponseTally)
+                .where(ResponseTally.question == row["question"], ResponseTally.option == row["option"])
+                .values(count=ResponseTally.count + row["count"])
+            )
+            if result.rowcount == 0:
+                db.session.execute(db.insert(ResponseTally).values(row))
+
+
+def load_tallies(question=None):
+    query = db.select(ResponseTally.question, ResponseTally.option, ResponseTally.count)
+    if question is not None:
+        query = query.where(ResponseTally.question == question)
+
+    tallies = defaultdict(dict)
+    for question, option, count in db.session.execute(query):
+        tallies[question][option] = count
+    return tallies
+
+
+def tally_counts(tallies, question):
+    """Return (total responses, {option: count}) for one question."""
+    options = dict(tallies.get(question, {}))
+    return options.pop(TALLY_TOTAL, 0), options
+
+
+def rebuild_tallies(source="answers"):
+    """Recompute response_tally; returns (tallies written, responses read into the app or None).
+
+    The "answers" source counts response_answers with GROUP BY inside the database, so no response
+    rows leave it; "responses" loads user_responses column-wise into the pandas engine instead (use it
+    before `flask backfill-answers` has run).
+    """
+    if db.engine.dialect.name == "postgresql":
+        # block concurrent submissions from touching the tallies until the rebuild commits
+        db.session.execute(text("LOCK TABLE response_tally IN EXCLUSIVE MODE"))
+    db.session.execute(db.delete(ResponseTally))
+
+    if source == "answers":
+        written = 0
+        for counts in (option_counts_query(), response_totals_query(TALLY_TOTAL)):
+            result = db.session.execute(db.insert(ResponseTally).from_select(["question", "option", "count"], counts))
+            written += result.rowcount
+        db.session.commit()
+        return written, None
+
+    from analytics import aggregate_responses, load_responses
+
+    df = load_responses()
+    counts = {}
+    for question, (total, option_counts) in aggregate_responses(df).items():
+        counts[(question, TALLY_TOTAL)] = total
+        counts.update({(question, option): int(count) for option, count in option_counts.items()})
+
+    increment_tallies(counts)
+    db.session.commit()
+    return len(counts), len(df)
@@ -0,0 +1,52 @@
+from sqlalchemy import Integer, func, cast
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import UserDetails, IdCounter
+
+
+USER_ID_PREFIX = "UID"
+USER_ID_COUNTER = "user_details.userid"
+
+
+def highest_user_id_number():
+    """Largest numeric suffix among existing UID### ids (numeric, so UID1000 sorts after UID999)."""
+    suffix = cast(func.substr(UserDetails.userid, len(USER_ID_PREFIX) + 1), Integer)
+    query = db.select(func.max(suffix)).where(UserDetails.userid.like(f"{USER_ID_PREFIX}%"))
+    return db.session.execute(query).scalar() or 0
+
+
+def seed_user_id_counter():
+    try:
+        with db.session.begin_nested():
+            db.session.add(IdCounter(name=USER_ID_COUNTER, value=highest_user_id_number()))
+    except IntegrityError:
+        pass  # another transaction seeded it first
+
+
+def next_user_id():
+    """Allocate the next UID### inside the current transaction.
+
+    The counter row stays locked until the caller commits, so concurrent signups queue on it
+    instead of racing to the same id.
+    """
+    bump = (db.update(IdCounter).where(IdCounter.name == USER_ID_COUNTER)
+            .values(value=IdCounter.value + 1).returning(IdCounter.value))
+    number = db.session.execute(bump).scalar()
+    if number is None:
+        seed_user_id_counter()
+        number = db.session.execute(bump).scalar()
+    return f"{USER_ID_PREFIX}{number:03d}"
+
+
+def sync_user_id_counter():
+    """Point the user id counter past the highest existing UID###; returns the next id."""
+    highest = highest_user_id_number()
+    counter = db.session.get(IdCounter, USER_ID_COUNTER)
+    if counter is None:
+        counter = IdCounter(name=USER_ID_COUNTER, value=highest)
+        db.session.add(counter)
+    else:
+        counter.value = max(counter.value, highest)
+    db.session.commit()
+    return f"{USER_ID_PREFIX}{counter.value + 1:03d}"
+
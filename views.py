@@ -0,0 +1,398 @@
+from flask import Blueprint, current_app, render_template, request, url_for, redirect, flash, make_response, \
+    send_file, jsonify, stream_with_context
+from werkzeug.exceptions import abort
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from flask_login import login_user, login_required, current_user, logout_user
+from functools import wraps, cache
+from importlib.util import find_spec
+from os import path
+import hashlib
+import base64
+import binascii
+import json
+from extensions import db
+from models import UserDetails, UserResponses, AdminDetails
+from questions import QUESTIONS, QUESTIONS_BY_FIELD
+from ingest import form_record, validate_submission, store_submissions
+from user_ids import next_user_id
+from identity import identity_cache
+from credentials import CredentialServiceBusy
+from snapshots import change_token, figure_snapshot, published_token
+from metrics import span
+from assets import ASSET_MAX_AGE, built_asset_url
+from search import SearchError, search
+from export import EXPORT_FORMATS, ExportError, export_chunks, export_partitions
+
+
+bp = Blueprint('main', __name__)
+
+# located without importing plotly, which only the figure endpoint needs
+PLOTLY_JS = path.join(find_spec('plotly').submodule_search_locations[0], 'package_data', 'plotly.min.js')
+PLOTLY_ASSET = 'JS/plotly.min.js'  # its name in the `flask build-assets` manifest
+
+
+@cache
+def plotly_js_fingerprint():
+    with open(PLOTLY_JS, 'rb') as bundle:
+        return hashlib.sha256(bundle.read()).hexdigest()[:12]
+
+
+def nocache(view): #browser cache settings
+    @wraps(view)
+    def no_cache_view(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        response.headers['Cache-Control'] = 'no-store, no-cache,must-revalidate, private, max-age=0'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
+        return response
+    return no_cache_view
+
+def hash_password(password):
+    try:
+        return current_app.extensions['credentials'].hash(password)
+    except CredentialServiceBusy:
+        abort(503, description="Too many sign-ins right now, please try again in a moment.")
+
+
+def verify_password(account, password): # rehashes with the configured parameters when they changed
+    try:
+        verified = current_app.extensions['credentials'].verify_and_update(account, password)
+    except CredentialServiceBusy:
+        abort(503, description="Too many sign-ins right now, please try again in a moment.")
+    if verified and account in db.session.dirty:
+        try:
+            db.session.commit()
+        except SQLAlchemyError as e: # the old hash still verifies, so the rehash waits for the next sign-in
+            db.session.rollback()
+            print(f"[DB ERROR] could not store the rehashed password: {e}")
+    return verified
+
+
+@bp.route('/signup', methods=["GET", "POST"])
+@nocache
+def signup():
+    if request.method == "POST":
+
+        email = request.form.get('email')
+        result = db.session.execute(db.select(UserDetails).where(UserDetails.email == email))
+        user = result.scalar()
+
+        if user: # if user exists...
+            flash("You've already signed up with that email, sign in instead!")
+            return redirect(url_for('.signin'))
+
+        hash_and_salted_password = hash_password(request.form.get('password'))
+
+        new_user = UserDetails(userid=next_user_id(), # allocated last so the counter lock is held briefly
+                        username=request.form.get('username'),
+                        email=request.form.get('email'),
+                        password=hash_and_salted_password,
+                        phone=request.form.get('phone'),
+                        )
+        db.session.add(new_user)
+        db.session.commit()
+        flash('Signup successful! Please login.', 'success')
+
+        return redirect(url_for(".signin"))
+    return render_template("signup.html", logged_in=current_user.is_authenticated)
+
+@bp.route('/', methods=["GET", "POST"])
+@nocache
+def signin():
+    if request.method == "POST":
+        email = request.form.get('email')
+        password = request.form.get('password')
+
+        result = db.session.execute(db.select(UserDetails).where(UserDetails.email == email))
+        user = result.scalar()
+
+        # Email doesn't exist or password incorrect.
+        if not user:
+            flash("That email does not exist, please try again.")
+            return redirect(url_for('.signin'))
+        elif not verify_password(user, password):
+            flash("Password is incorrect, please try again.")
+            return redirect(url_for('.signin'))
+        else:
+            login_user(user)
+            return redirect(url_for('.home'))
+
+    return render_template("signin.html")
+
+@bp.route('/home', methods=["GET", "POST"])
+@nocache
+@login_required
+def home():
+    if request.method == "POST":
+        record = form_record(request.form, current_user.userid, current_user.email)
+
+        errors = validate_submission(record)
+        buffer = current_app.extensions.get('submission_buffer')
+        if errors:
+            flash("An error occurred while submitting the survey.", "danger")
+            print(f"[VALIDATION ERROR] {'; '.join(errors)}")
+        elif buffer is not None and buffer.submit(record): # write-behind; falls through when the buffer is full
+            flash("Survey submitted successfully!", "success")
+        else:
+            try:
+                store_submissions([record])
+                db.session.commit()
+                flash("Survey submitted successfully!", "success")
+            except Exception as e:
+                db.session.rollback()
+                flash("An error occurred while submitting the survey.", "danger")
+                print(f"[DB ERROR] {e}")
+        return redirect(url_for('.home'))
+
+    try:
+        return render_template("home.html", name=current_user.username, logged_in=True)
+    except Exception as e:
+        print(f"[ERROR] Failed to render home: {e}")
+        return abort(403, description="Unauthorized Access")
+
+@bp.route('/admin', methods=["GET", "POST"])
+@nocache
+def adminsignin():
+    if request.method == "POST":
+        email = request.form.get('email')
+        password = request.form.get('password')
+
+        result = db.session.execute(db.select(AdminDetails).where(AdminDetails.email == email))
+        adminuser = result.scalar()
+
+        # Email doesn't exist or password incorrect.
+        if not adminuser:
+            flash("That email does not exist, please try again.")
+            return redirect(url_for('.adminsignin'))
+        elif not verify_password(adminuser, password):
+            flash("Password is incorrect, please try again.")
+            return redirect(url_for('.adminsignin'))
+        else:
+            login_user(adminuser)
+            return redirect(url_for('.admin_dashboard'))
+
+    return render_template("adminsignin.html")
+
+
+def admin_required(function): # decorator function to check if user is admin or not to get to admin dashboard
+    @wraps(function)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or not isinstance(current_user._get_current_object(), AdminDetails):
+            abort(403)
+        return function(*args, **kwargs)
+    return decorated_function
+
+
+def revalidate(response, etag):
+    """Let the browser keep `response` but check its ETag before every reuse."""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag):
+    return revalidate(current_app.response_class(status=304), etag)
+
+
+def dashboard_token():
+    """The last set published by `flask precompute-dashboard` when DASHBOARD_PRECOMPUTED, else the live token."""
+    with span("dashboard.token"):
+        if current_app.config['DASHBOARD_PRECOMPUTED']:
+            token = published_token(current_app.extensions.get('dashboard_cache'))
+            if token is not None:
+                return token
+        return change_token()
+
+
+@bp.route('/admin/dashboard')
+@admin_required
+def admin_dashboard():
+    # the figure URLs carry the change token, so an unchanged dashboard is one token lookup and a 304
+    token = dashboard_token()
+    plotly_js_url = built_asset_url(PLOTLY_ASSET) or url_for('.plotly_js', fingerprint=plotly_js_fingerprint())
+    assets = current_app.extensions['asset_build']  # a rebuild changes the script URLs in the page
+    etag = hashlib.sha256(f"{token}:{current_user.get_id()}:{plotly_js_url}:{assets}".encode()).hexdigest()[:16]
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    with span("dashboard.render"):
+        page = render_template("admindashboard.html", admin_email=current_user.email,
+                               questions=QUESTIONS, plotly_js_url=plotly_js_url, token=token)
+    return revalidate(make_response(page), etag)
+
+
+RESPONSE_SORTS = {"id": UserResponses.id, "userid": UserResponses.userid, "useremail": UserResponses.useremail}
+RESPONSE_FILTERS = ("userid", "useremail")
+RESPONSE_PAGE_SIZE = 50
+RESPONSE_MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        abort(400, description="Invalid cursor")
+
+
+@bp.route('/admin/responses')
+@nocache
+@admin_required
+def admin_responses(): # keyset-paginated user_responses for the dashboard table
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    column = RESPONSE_SORTS.get(sort.lstrip('-'))
+    limit = request.args.get('limit', RESPONSE_PAGE_SIZE, type=int)
+    if column is None or not 0 < limit <= RESPONSE_MAX_PAGE_SIZE:
+        abort(400, description="Invalid sort or limit")
+
+    query = db.select(UserResponses)
+    for field in RESPONSE_FILTERS:
+        value = request.args.get(field)
+        if value:
+            query = query.where(getattr(UserResponses, field) == value)
+
+    # id breaks ties so the (sort column, id) pair is unique and pages never overlap
+    keys = [UserResponses.id] if column is UserResponses.id else [column, UserResponses.id]
+    cursor = request.args.get('after')
+    if cursor:
+        values = decode_cursor(cursor)
+        if not (isinstance(values, list) and len(values) == len(keys)
+                and all(type(value) is (int if key is UserResponses.id else str) for key, value in zip(keys, values))):
+            abort(400, description="Invalid cursor")
+        position, after = (keys[0], values[0]) if len(keys) == 1 else (tuple_(*keys), tuple_(*values))
+        query = query.where(position < after if descending else position > after)
+
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys]).limit(limit + 1)
+    rows = db.session.execute(query).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+    return jsonify(responses=[row.to_dict() for row in rows], next=next_cursor)
+
+
+@bp.route('/admin/dashboard/figures/<qid>')
+@admin_required
+def dashboard_figure(qid): # plotly figure JSON for one question, fetched lazily by the dashboard
+    spec = QUESTIONS_BY_FIELD.get(qid)
+    if spec is None:
+        abort(404)
+
+    token = dashboard_token()
+    etag = f"{qid}-{token}"
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    response = current_app.response_class(figure_snapshot(current_app.extensions.get('dashboard_cache'), spec, token),
+                                          mimetype='application/json')
+    if request.args.get('v') != token:
+        return revalidate(response, etag)
+    response.set_etag(etag)  # requested under the current token: that URL's content never changes
+    response.cache_control.private = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@bp.route('/admin/analytics/crosstab')
+@admin_required
+def analytics_crosstab(): # ?rows=question11&columns=question2&where=question1:1-3 years (repeatable)
+    from crosstab import CrosstabError, crosstab_query
+
+    try:
+        result = crosstab_query(request.args.get('rows'), request.args.get('columns'), request.args.getlist('where'))
+    except CrosstabError as e:
+        abort(400, description=str(e))
+
+    etag = hashlib.sha256(f"{result['token']}:{request.query_string.decode()}".encode()).hexdigest()[:16]
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+    return revalidate(jsonify(result), etag)
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+@bp.route('/admin/search')
+@admin_required
+def admin_search(): # ?q=adoption "too much" cost*&question=question8&limit=20&after=<next from the last page>
+    limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+    if not 0 < limit <= SEARCH_MAX_PAGE_SIZE:
+        abort(400, description="Invalid limit")
+    after = None
+    cursor = request.args.get('after')
+    if cursor:
+        after = decode_cursor(cursor)
+        if not (isinstance(after, list) and len(after) == 2 and isinstance(after[0], int)
+                and isinstance(after[1], str)):
+            abort(400, description="Invalid cursor")
+        after = tuple(after)
+
+    try:
+        result = search(request.args.get('q'), request.args.get('question'), limit, after)
+    except SearchError as e:
+        abort(400, description=str(e))
+
+    etag = hashlib.sha256(f"{result['token']}:{request.query_string.decode()}".encode()).hexdigest()[:16]
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+    return revalidate(jsonify({**result, 'next': encode_cursor(result['next']) if result['next'] else None}), etag)
+
+
+@bp.route('/assets/plotly-<fingerprint>.min.js')
+def plotly_js(fingerprint): # the bundled plotly.js, served once and cached for a year under its content hash
+    if fingerprint != plotly_js_fingerprint():
+        abort(404)
+
+    response = send_file(PLOTLY_JS, mimetype='text/javascript', max_age=ASSET_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@bp.route('/admin/responses/export')
+@admin_required
+def export_responses():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        abort(400, description=f"Unknown export format {export_format!r}")
+
+    partitions = export_partitions(min_id=request.args.get('min_id', type=int),
+                                   max_id=request.args.get('max_id', type=int),
+                                   userid=request.args.get('userid'),
+                                   useremail=request.args.get('useremail'))
+    try:
+        chunks = export_chunks(export_format, partitions)
+    except ExportError as e:
+        abort(501, description=str(e))
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=user_responses.{extension}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@bp.route('/logout')
+@nocache
+@login_required
+def logout():
+    identity_cache.invalidate(current_user.get_id())
+    logout_user()
+    return redirect(url_for('.signin'))
+
+@bp.route('/adminlogout')
+@nocache
+@login_required
+def adminlogout():
+    identity_cache.invalidate(current_user.get_id())
+    logout_user()
+    return redirect(url_for('.adminsignin'))